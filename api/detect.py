@@ -5,28 +5,87 @@ Traffic light detection  → HSV colour masking  (runs everywhere)
 Traffic sign detection   → HSV shape analysis  (runs everywhere)
 YOLOv8 sign detection   → local only           (too large for Vercel)
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 import cv2
 import numpy as np
-import os, sys, base64
+import os, sys, base64, json, time, threading, tarfile, tempfile, zipfile
+from collections import OrderedDict
+from werkzeug.http import parse_content_range_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
 
 # ── Path setup ──────────────────────────────────────────────────
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(ROOT, 'src'))
 
+# ── Detection thresholds from config.ini (hot-reloaded) ─────────
+from detection_config import ConfigManager
+try:
+    detection_config = ConfigManager()
+except Exception as _e:
+    print(f"⚠️ config.ini not loaded, using built-in thresholds: {_e}")
+    detection_config = None
+
+# ── Detector pools: one instance per concurrent request ─────────
+# DETECTOR_POOL_SIZE / DETECTOR_POOL_TIMEOUT / DETECTOR_THREADS env vars;
+# OpenCV and PyTorch threads are capped so the pool does not oversubscribe cores.
+from detector_pool import DetectorPool, PoolTimeout
+
 # ── Lightweight HSV detector (always available) ─────────────────
 from signal_detector import TrafficDetector
-hsv_detector = TrafficDetector()
+hsv_pool = DetectorPool.from_env(lambda: TrafficDetector(config=detection_config), name='hsv').warm(1)
 
 # ── Optional: try to load the full YOLO-based unified detector ──
 # (works locally; silently skipped on Vercel / resource-limited envs)
 try:
     from unified_detector import UnifiedTrafficDetector
-    full_detector = UnifiedTrafficDetector(enable_lights=True, enable_signs=True)
+    full_pool = DetectorPool.from_env(
+        lambda: UnifiedTrafficDetector(enable_lights=True, enable_signs=True, config=detection_config),
+        name='yolo').warm(1)
     FULL_DETECTOR = True
 except Exception as _e:
+    full_pool = None
     FULL_DETECTOR = False
 
+# ── QoS scheduling (QOS_* env vars) ─────────────────────────────
+# Live frames are admitted ahead of uploads, batches and video jobs;
+# queued live frames are dropped once stale or superseded.
+from qos_scheduler import QoSScheduler, QueueTimeout, RequestDropped
+scheduler = QoSScheduler.from_env(hsv_pool.size)
+
+def scheduled(detect, priority, key=None, deadline=None):
+    """Wrap a detect function so it runs in a detection slot of its QoS class."""
+    def run(image):
+        timeout = None if deadline is None else deadline.wait_timeout(scheduler.timeout)
+        with scheduler.slot(priority, key=key, timeout=timeout):
+            return detect(image)
+    return run
+
+# ── Per-request latency budget (X-Deadline-Ms / DETECT_DEADLINE_MS) ──
+# Tight budgets or busy pools degrade the pipeline instead of timing out.
+from request_budget import DeadlinePolicy
+deadline_policy = DeadlinePolicy.from_env()
+latency = deadline_policy.latency
+
+# ── Opt-in sampling profiler (PROFILE_* env vars) ───────────────
+from profiler import RequestProfiler
+profiler = RequestProfiler.from_env()
+
+# ── Per-stream change gates (live webcam frames) ───────────────
+# Static scenes reuse the previous result instead of re-running detection.
+from change_gate import SceneChangeGate
+MAX_STREAMS = 64
+_stream_gates = OrderedDict()
+_stream_lock = threading.Lock()
+
+def stream_gate(stream_id):
+    """Return the change gate of a live stream (LRU-bounded)."""
+    with _stream_lock:
+        gate = _stream_gates.pop(stream_id, None) or SceneChangeGate()
+        _stream_gates[stream_id] = gate
+        while len(_stream_gates) > MAX_STREAMS:
+            _stream_gates.popitem(last=False)
+        return gate
+
 # ── Flask app ────────────────────────────────────────────────────
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024   # 16 MB
@@ -40,33 +99,51 @@ def to_b64(cv_img):
     _, buf = cv2.imencode('.jpg', cv_img)
     return 'data:image/jpeg;base64,' + base64.b64encode(buf).decode()
 
-def detect_hsv(image):
+def downscale(image):
+    """Shrink images larger than 800x600 (keeping the aspect ratio)."""
+    h, w = image.shape[:2]
+    if w > 800 or h > 600:
+        scale = min(800/w, 600/h)
+        image = cv2.resize(image, (int(w*scale), int(h*scale)))
+    return image
+
+def detect_hsv(image, include_image=True, deadline=None):
     """HSV-based detection: traffic lights + shape-based signs."""
+    timeout = None if deadline is None else deadline.wait_timeout(hsv_pool.timeout)
+    with hsv_pool.checkout(timeout) as hsv_detector:
+        t0 = time.perf_counter()
+        sig_key, sig_text, sig_color = hsv_detector.detect_light(image)
+        sign_detections = hsv_detector.detect_signs(image)
+    latency.observe('hsv', (time.perf_counter() - t0) * 1000, image.shape[0] * image.shape[1])
+    if include_image and deadline is not None and deadline.expired:
+        include_image = False
+        deadline.degrade('no_image')
+    t0 = time.perf_counter()
+
     # ── Traffic light ────────────────────────────────────────────
-    sig_key, sig_text, sig_color = hsv_detector.detect_light(image)
 
     # Annotate: coloured bar + label
-    annotated = image.copy()
-    cv2.rectangle(annotated, (10, 10), (220, 60), sig_color, -1)
-    cv2.putText(annotated, sig_text, (20, 47),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+    annotated = image.copy() if include_image else None
+    if include_image:
+        cv2.rectangle(annotated, (10, 10), (220, 60), sig_color, -1)
+        cv2.putText(annotated, sig_text, (20, 47),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
 
     # ── Signs ────────────────────────────────────────────────────
-    sign_detections = hsv_detector.detect_signs(image)
     signs_found = []
     for det in sign_detections:
         if det.get('type') == 'none':
             continue
         name = det.get('name', '')
         signs_found.append(name)
-        if 'box' in det:
+        if include_image and 'box' in det:
             x, y, w, h = det['box']
             color = det.get('color', (0, 255, 0))
             cv2.rectangle(annotated, (x, y), (x+w, y+h), color, 2)
             cv2.putText(annotated, name, (x, y - 8),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
-    return {
+    result = {
         'success': True,
         'traffic_light': {
             'detected':  sig_key,
@@ -79,17 +156,88 @@ def detect_hsv(image):
             'signs':  signs_found,
             'status': f'Detected {len(signs_found)} sign(s)' if signs_found else 'No signs detected'
         },
-        'image': to_b64(annotated),
         'mode': 'hsv'
     }
+    if include_image:
+        result['image'] = to_b64(annotated)
+        latency.observe('encode', (time.perf_counter() - t0) * 1000, image.shape[0] * image.shape[1])
+    return result
 
-def detect_full(image):
+def detect_full(image, include_image=True, deadline=None):
     """Full YOLO-based detection (local only)."""
-    result = full_detector.detect_all(image)
+    timeout = None if deadline is None else deadline.wait_timeout(full_pool.timeout)
+    with full_pool.checkout(timeout) as full_detector:
+        t0 = time.perf_counter()
+        result = full_detector.detect_all(image)
+    latency.observe('yolo', (time.perf_counter() - t0) * 1000)
+    if include_image and deadline is not None and deadline.expired:
+        include_image = False
+        deadline.degrade('no_image')
+    t0 = time.perf_counter()
+    response = format_full(result, include_image)
+    if include_image:
+        latency.observe('encode', (time.perf_counter() - t0) * 1000, image.shape[0] * image.shape[1])
+    return response
+
+def plan_detection(image, deadline):
+    """
+    Fit the pipeline into the time left: skip YOLO for the HSV detectors,
+    then skip annotating/encoding the image, then shrink the image, as
+    far as the estimated stage latencies (plus the wait for a pooled
+    detector) require. Unmeasured stages are assumed to fit.
+
+    Returns:
+        tuple: (use_full, include_image, image)
+    """
+    remaining = deadline.remaining_ms()
+    pixels = image.shape[0] * image.shape[1]
+    use_full = FULL_DETECTOR
+    if use_full:
+        yolo = latency.estimate('yolo')
+        cost = (yolo or 0) + full_pool.expected_wait_ms(yolo)
+        if cost > remaining:
+            use_full = False
+            deadline.degrade('hsv_signs')
+        else:
+            # Give up waiting for YOLO in time to fall back to HSV
+            deadline.reserve_ms = latency.estimate('hsv', pixels) or 0
+    if not use_full:
+        hsv = latency.estimate('hsv', pixels)
+        cost = (hsv or 0) + hsv_pool.expected_wait_ms(hsv)
+
+    include_image = cost + (latency.estimate('encode', pixels) or 0) <= remaining
+    if not include_image:
+        deadline.degrade('no_image')
+
+    width = image.shape[1]
+    if not use_full and cost > remaining and width > deadline_policy.min_width:
+        # HSV cost grows with the pixel count; unmeasured (and already late) goes to min_width
+        fit = (max(remaining, 0) / cost) ** 0.5 if cost > 0 else 0.0
+        scale = max(fit, deadline_policy.min_width / width)
+        image = cv2.resize(image, (int(width * scale), int(image.shape[0] * scale)),
+                           interpolation=cv2.INTER_AREA)
+        deadline.degrade('downscale')
+    return use_full, include_image, image
+
+def detect_within(image, deadline):
+    """Detection degraded as needed to meet a request deadline."""
+    use_full, include_image, image = plan_detection(image, deadline)
+    if use_full:
+        try:
+            result = detect_full(image, include_image, deadline)
+        except PoolTimeout:
+            deadline.degrade('hsv_signs')
+            deadline.reserve_ms = 0
+            result = detect_hsv(image, include_image and not deadline.expired, deadline)
+    else:
+        result = detect_hsv(image, include_image, deadline)
+    return dict(result, degraded=list(deadline.degraded))
+
+def format_full(result, include_image=True):
+    """API response for one UnifiedTrafficDetector result."""
     light  = result.get('lights', {})
     signs  = result.get('signs', {})
-    ann    = result.get('annotated_frame', image)
-    return {
+    response = {
         'success': True,
         'traffic_light': {
             'detected':  light.get('signal', 'unknown') if light else 'unknown',
@@ -103,9 +251,11 @@ def detect_full(image):
             'signs':  signs.get('signs', [])      if signs else [],
             'status': signs.get('status', 'No signs') if signs else 'No signs'
         },
-        'image': to_b64(ann),
         'mode': 'yolo'
     }
+    if include_image:
+        response['image'] = to_b64(result['annotated_frame'])
+    return response
 
 def read_image_from_request():
     """Return decoded OpenCV image from uploaded file or base64 form field."""
@@ -133,28 +283,349 @@ def read_image_from_request():
 
 @app.route('/api/detect', methods=['POST'])
 def detect_signal():
+    reason = profiler.should_profile(request.headers)
+    t0 = time.perf_counter()
+    with profiler.profile(reason, 'detect') as session:
+        response, status = _detect_signal()
+    profiler.observe((time.perf_counter() - t0) * 1000)
+    response = app.make_response((response, status))
+    if session is not None and session.path:
+        response.headers['X-Profile-File'] = os.path.basename(session.path)
+    return response
+
+
+def _detect_signal():
+    started = time.perf_counter()
     try:
         if 'file' not in request.files and 'image' not in request.form:
             return jsonify({'error': 'No image provided'}), 400
 
+        try:
+            deadline = deadline_policy.deadline(request.headers, request.form, started)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         image, err = read_image_from_request()
         if image is None:
             return jsonify({'error': err or 'Failed to decode image'}), 400
 
         # Downscale if needed
-        h, w = image.shape[:2]
-        if w > 800 or h > 600:
-            scale = min(800/w, 600/h)
-            image = cv2.resize(image, (int(w*scale), int(h*scale)))
-
-        # Use best available detector
-        result = detect_full(image) if FULL_DETECTOR else detect_hsv(image)
+        image = downscale(image)
+
+        # Live frames (webcam streams) go ahead of one-off uploads
+        stream_id = request.form.get('stream')
+        priority = request.form.get('priority') or request.headers.get('X-Priority') or \
+            ('live' if stream_id else 'bulk')
+        if priority not in scheduler.classes:
+            return jsonify({'error': f"priority must be one of: {', '.join(scheduler.classes)}"}), 400
+
+        # Use best available detector (degraded as needed to meet a deadline)
+        if deadline is not None:
+            detect = lambda frame: detect_within(frame, deadline)
+        else:
+            detect = detect_full if FULL_DETECTOR else detect_hsv
+        detect = scheduled(detect, priority, key=stream_id, deadline=deadline)
+        if stream_id:
+            result, reused = stream_gate(stream_id).run(image, detect)
+            result = dict(result, reused=reused)
+        else:
+            result = detect(image)
+        if deadline is not None:
+            # A reused result keeps the degradations it was computed with
+            result.update((key, value) for key, value in deadline.report().items() if key != 'degraded')
         return jsonify(result), 200
 
+    except RequestDropped as e:
+        return jsonify({'error': str(e), 'dropped': e.reason}), 503
+    except (PoolTimeout, QueueTimeout) as e:
+        response = jsonify({'error': f'Server busy: {str(e)}'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         return jsonify({'error': f'Processing error: {str(e)}'}), 500
 
 
+# ── Batch detection (streamed NDJSON) ──────────────────────────
+BATCH_MAX_CONTENT_LENGTH = 512 * 1024 * 1024   # 512 MB
+BATCH_SIZE = 16
+ARCHIVE_MIMETYPES = {'application/zip', 'application/x-tar', 'application/gzip',
+                     'application/x-gzip', 'application/x-compressed-tar', 'application/octet-stream'}
+
+def decode_image(data):
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return (image, None) if image is not None else (None, 'Failed to decode image')
+
+def iter_archive(stream, name):
+    """Yield (name, image, error) per image member of a zip or (compressed) tar, one at a time."""
+    if name.lower().endswith('.zip'):
+        if not stream.seekable():
+            spooled = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+            while True:
+                chunk = stream.read(1024 * 1024)
+                if not chunk:
+                    break
+                spooled.write(chunk)
+            stream = spooled
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and allowed(info.filename):
+                    yield (info.filename,) + decode_image(archive.read(info))
+    else:
+        # Stream mode: members are read in order without seeking
+        with tarfile.open(fileobj=stream, mode='r|*') as archive:
+            for member in archive:
+                if member.isfile() and allowed(member.name):
+                    yield (member.name,) + decode_image(archive.extractfile(member).read())
+
+def iter_multipart_images():
+    """
+    Yield (name, image, error) per uploaded image while the multipart body
+    is still arriving (request.files would buffer the whole upload first).
+    `files`/`file` parts are images; `archive` parts are spooled to a
+    temporary file and expanded.
+    """
+    decoder = MultipartDecoder(request.mimetype_params.get('boundary', '').encode())
+    stream = request.stream
+    part, buffer = None, None
+    while True:
+        chunk = stream.read(64 * 1024)
+        decoder.receive_data(chunk or None)
+        event = decoder.next_event()
+        while not isinstance(event, (NeedData, Epilogue)):
+            if isinstance(event, File) and event.name in ('files', 'file', 'archive'):
+                part = event
+                buffer = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) if event.name == 'archive' else []
+            elif isinstance(event, (File, Field)):
+                part = None
+            elif isinstance(event, Data) and part is not None:
+                if part.name == 'archive':
+                    buffer.write(event.data)
+                else:
+                    buffer.append(event.data)
+                if not event.more_data:
+                    if part.name == 'archive':
+                        buffer.seek(0)
+                        with buffer:
+                            yield from iter_archive(buffer, part.filename)
+                    elif allowed(part.filename):
+                        yield (part.filename,) + decode_image(b''.join(buffer))
+                    else:
+                        yield part.filename, None, 'Invalid or missing file'
+                    part = None
+            event = decoder.next_event()
+        if isinstance(event, Epilogue) or not chunk:
+            break
+
+def iter_batch_images():
+    """Yield (name, image, error) for every image of a batch request, decoding one at a time."""
+    if request.mimetype in ARCHIVE_MIMETYPES:
+        name = request.args.get('name', 'upload.zip' if request.mimetype == 'application/zip' else 'upload.tar')
+        return iter_archive(request.stream, name)
+    return iter_multipart_images()
+
+def _run_batch(pending, include_image):
+    """
+    Detect one batch of (index, name, image, error); entries without an
+    image keep their error. Returns one response dict per entry, in order.
+    """
+    images = [image for _, _, image, _ in pending if image is not None]
+    responses = []
+    if images:
+        try:
+            with scheduler.slot('bulk'):
+                if FULL_DETECTOR:
+                    with full_pool.checkout() as full_detector:
+                        results = full_detector.detect_batch(images)
+                    responses = [format_full(result, include_image) for result in results]
+                else:
+                    responses = [detect_hsv(image, include_image) for image in images]
+        except Exception as e:
+            responses = [{'success': False, 'error': f'Processing error: {str(e)}'}] * len(images)
+    responses = iter(responses)
+    return [dict(next(responses) if image is not None else {'success': False, 'error': error},
+                 index=index, name=name)
+            for index, name, image, error in pending]
+
+def _batch_lines(include_image, batch_size):
+    """NDJSON lines: one per image as soon as its batch is done, then a summary line."""
+    t0 = time.perf_counter()
+    count = errors = 0
+    pending = []
+    try:
+        for name, image, error in iter_batch_images():
+            # Undecodable images wait in the batch too, so lines stay in upload order
+            pending.append((count, name, None if image is None else downscale(image), error))
+            count += 1
+            # The HSV path has no batched model call, so its images go out one by one
+            if sum(entry[2] is not None for entry in pending) >= (batch_size if FULL_DETECTOR else 1):
+                for response in _run_batch(pending, include_image):
+                    errors += not response['success']
+                    yield json.dumps(response) + '\n'
+                pending = []
+    except (zipfile.BadZipFile, tarfile.TarError, ValueError) as e:
+        archive_error = f'Invalid archive: {str(e)}'
+    else:
+        archive_error = None
+    for response in _run_batch(pending, include_image):
+        errors += not response['success']
+        yield json.dumps(response) + '\n'
+    if archive_error:
+        # After the images read before the archive broke off
+        errors += 1
+        yield json.dumps({'success': False, 'error': archive_error}) + '\n'
+    yield json.dumps({'summary': {
+        'images': count,
+        'errors': errors,
+        'elapsed_ms': round((time.perf_counter() - t0) * 1000, 1)
+    }}) + '\n'
+
+
+@app.route('/api/detect/batch', methods=['POST'])
+def detect_batch():
+    """
+    Detect many images in one request. Results are streamed back as
+    NDJSON (one line per image, in upload order, then a summary line)
+    while later images are still being decoded and detected.
+
+    Query parameters: images=1 to include annotated images,
+    batch_size (1-64) for the YOLO detector, name for raw archive bodies.
+    """
+    request.max_content_length = BATCH_MAX_CONTENT_LENGTH
+    if request.mimetype not in ARCHIVE_MIMETYPES and request.mimetype != 'multipart/form-data':
+        return jsonify({'error': 'No images provided (use multipart files/archive, or a zip/tar body)'}), 400
+
+    include_image = request.args.get('images', '0').lower() in ('1', 'true', 'yes')
+    batch_size = max(1, min(64, request.args.get('batch_size', BATCH_SIZE, type=int)))
+    return Response(stream_with_context(_batch_lines(include_image, batch_size)),
+                    mimetype='application/x-ndjson')
+
+
+# ── Video jobs (chunked upload → background worker) ────────────
+# Created on first use so read-only deployments (Vercel) never touch the disk.
+# JOBS_DIR picks the on-disk job store; unfinished jobs resume after a restart.
+_video_jobs = None
+_video_jobs_lock = threading.Lock()
+
+def video_jobs():
+    """Return the (store, worker) pair, starting the worker on first use."""
+    global _video_jobs
+    with _video_jobs_lock:
+        if _video_jobs is None:
+            from video_jobs import VideoJobStore, VideoJobWorker
+            store = VideoJobStore(os.environ.get('JOBS_DIR') or os.path.join(ROOT, 'jobs'))
+            worker = VideoJobWorker(store, full_pool if FULL_DETECTOR else hsv_pool,
+                                    scheduler=scheduler).start()
+            _video_jobs = (store, worker)
+        return _video_jobs
+
+def _job_or_404(job_id):
+    job = video_jobs()[0].get(job_id)
+    if job is None:
+        return None, (jsonify({'error': 'Unknown job'}), 404)
+    return job, None
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Create a video job; upload the file to upload_url, then POST start_url."""
+    params = request.get_json(silent=True)
+    if params is None:
+        params = request.form
+    elif not isinstance(params, dict):
+        return jsonify({'error': 'JSON body must be an object'}), 400
+    try:
+        job = video_jobs()[0].create(
+            filename=params.get('filename', 'video.mp4'),
+            stride=int(params.get('stride', 5)),
+            annotate=str(params.get('annotate', 'false')).lower() in ('1', 'true', 'yes'),
+            batch_size=int(params.get('batch_size', 8)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(dict(job, upload_url=f"/api/jobs/{job['id']}/upload",
+                        start_url=f"/api/jobs/{job['id']}/start")), 201
+
+
+@app.route('/api/jobs/<job_id>/upload', methods=['PUT', 'POST'])
+def upload_job_chunk(job_id):
+    """
+    Append one chunk of the video. The chunk's byte offset comes from
+    ?offset=N or a Content-Range header; a mismatch returns 409 with the
+    bytes received so far, so clients can resume interrupted uploads.
+    """
+    job, error = _job_or_404(job_id)
+    if error:
+        return error
+    offset = request.args.get('offset', type=int)
+    content_range = request.headers.get('Content-Range')
+    if offset is None and content_range:
+        parsed = parse_content_range_header(content_range)
+        if parsed is None or parsed.units != 'bytes' or parsed.start is None:
+            return jsonify({'error': f'Invalid Content-Range: {content_range}'}), 400
+        offset = parsed.start
+    if offset is None:
+        offset = job['received']
+    try:
+        job = video_jobs()[0].append_chunk(job_id, offset, request.get_data(cache=False))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'received': job['received']}), 409
+    return jsonify({'id': job_id, 'received': job['received']}), 200
+
+
+@app.route('/api/jobs/<job_id>/start', methods=['POST'])
+def start_job(job_id):
+    """Finish the upload and queue the job for processing."""
+    job, error = _job_or_404(job_id)
+    if error:
+        return error
+    if job['status'] != 'uploading' or not job['received']:
+        return jsonify({'error': f"Job is {job['status']} with {job['received']} bytes uploaded"}), 409
+    return jsonify(video_jobs()[1].submit(job_id)), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Job status and progress (fraction of frames, when the frame count is known)."""
+    job, error = _job_or_404(job_id)
+    return error or (jsonify(job), 200)
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job, error = _job_or_404(job_id)
+    if error:
+        return error
+    try:
+        return jsonify(video_jobs()[1].cancel(job_id)), 200
+    except ValueError as e:
+        return jsonify({'error': f'Cannot cancel: {str(e)}'}), 409
+
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """Per-frame results as JSONL (partial while the job is still processing)."""
+    job, error = _job_or_404(job_id)
+    if error:
+        return error
+    path = video_jobs()[0].path(job_id, 'results.jsonl')
+    if not os.path.exists(path):
+        return jsonify({'error': f"No results yet (job is {job['status']})"}), 404
+    return send_file(path, mimetype='application/x-ndjson', as_attachment=True,
+                     download_name=f"{os.path.splitext(job['filename'])[0]}.jsonl")
+
+
+@app.route('/api/jobs/<job_id>/video', methods=['GET'])
+def job_video(job_id):
+    """Annotated video of the sampled frames (jobs created with annotate=true, once done)."""
+    job, error = _job_or_404(job_id)
+    if error:
+        return error
+    path = video_jobs()[0].path(job_id, 'annotated.mp4')
+    if job['status'] != 'done' or not os.path.exists(path):
+        return jsonify({'error': f"No annotated video (job is {job['status']}, annotate={job['annotate']})"}), 404
+    return send_file(path, mimetype='video/mp4', as_attachment=True,
+                     download_name=f"{os.path.splitext(job['filename'])[0]}_annotated.mp4")
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     return jsonify({
@@ -166,6 +637,12 @@ def health():
             'traffic_signs':   'enabled',
             'realtime_webcam': 'supported',
             'image_upload':    'supported',
+        },
+        'pools': [pool.stats() for pool in (hsv_pool, full_pool) if pool is not None],
+        'qos': scheduler.stats(),
+        'deadline': {
+            'default_ms': deadline_policy.default_ms,
+            'stage_estimates': latency.stats()
         }
     }), 200
 
@@ -539,7 +1016,7 @@ def index():
 /* ── State ── */
 let camStream=null,detectTimer=null,fpsTimer2=null;
 let isLive=false,paused=false,frames=0,fpsBucket=0,fps=0;
-let intervalMs=500,requesting=false,lastSig='';
+let intervalMs=500,requesting=false,lastSig='',streamId='';
 
 const video     =document.getElementById('video');
 const capCanvas =document.getElementById('capCanvas');
@@ -571,6 +1048,7 @@ async function startLive(){
         document.getElementById('fpsChip').style.display='block';
         setButtons(false,true,true);
         isLive=true;paused=false;lastSig='';
+        streamId=Date.now().toString(36)+Math.random().toString(36).slice(2,8);
         renderLoop();
         detectTimer=setInterval(sendFrame,intervalMs);
         fpsTimer2=setInterval(()=>{
@@ -594,7 +1072,7 @@ function sendFrame(){
     const t0=performance.now();requesting=true;
     capCanvas.toBlob(blob=>{
         if(!blob){requesting=false;return;}
-        const fd=new FormData();fd.append('file',blob,'frame.jpg');
+        const fd=new FormData();fd.append('file',blob,'frame.jpg');fd.append('stream',streamId);fd.append('priority','live');
         fetch('/api/detect',{method:'POST',body:fd})
         .then(r=>r.json()).then(data=>{
             requesting=false;
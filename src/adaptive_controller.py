@@ -0,0 +1,145 @@
+"""
+Adaptive Resolution Controller
+Self-tunes processing resolution and detection stride for live loops
+from measured detection latency
+"""
+
+import cv2
+
+
+class AdaptiveResolutionController:
+    """
+    Picks the processing resolution and detection stride (detect every Nth
+    frame) that keep detection within a target FPS and latency budget.
+
+    - Overloaded (latency above budget): lower resolution first, since stride
+      cannot shorten a single detection; if only the amortized per-frame cost
+      is too high, raise the stride first.
+    - Headroom (the next step up is predicted to stay well under budget for
+      `patience` detections): lower the stride back to 1, then raise
+      resolution.
+    The gap between the overload and headroom thresholds, the patience
+    counter and a cooldown after each change provide hysteresis.
+    """
+
+    RESOLUTIONS = [(320, 240), (400, 300), (480, 360), (560, 420), (640, 480)]
+
+    def __init__(self, target_fps=30, latency_budget_ms=None, resolutions=None,
+                 start_level=None, max_stride=4, smoothing=0.2, headroom=0.6,
+                 patience=20, cooldown=10):
+        """
+        Initialize the controller.
+
+        Args:
+            target_fps (float): Display frame rate to sustain
+            latency_budget_ms (float): Max time for one detection (default: two frame times)
+            resolutions (list): (width, height) ladder, smallest first
+            start_level (int): Initial ladder index (default: middle)
+            max_stride (int): Largest detection stride allowed
+            smoothing (float): EMA factor for latency (0-1, higher = faster reaction)
+            headroom (float): Fraction of the budget the next quality step must stay under
+            patience (int): Consecutive headroom detections required before stepping up
+            cooldown (int): Detections ignored after a change while latency settles
+        """
+        self.resolutions = list(resolutions or self.RESOLUTIONS)
+        self.frame_budget_ms = 1000.0 / target_fps
+        self.latency_budget_ms = latency_budget_ms or 2 * self.frame_budget_ms
+        self.max_stride = max_stride
+        self.smoothing = smoothing
+        self.headroom = headroom
+        self.patience = patience
+        self.cooldown = cooldown
+
+        self.level = len(self.resolutions) // 2 if start_level is None else start_level
+        self.stride = 1
+        self.latency_ms = None
+        self.changes = 0
+
+        self._frame_index = 0
+        self._calm = 0
+        self._settling = 0
+
+    @property
+    def resolution(self):
+        return self.resolutions[self.level]
+
+    def should_detect(self):
+        """Advance the frame counter; True when this frame should run detection."""
+        self._frame_index += 1
+        return self._frame_index % self.stride == 0
+
+    def prepare(self, frame):
+        """Resize a frame to the current processing resolution."""
+        width, height = self.resolution
+        if frame.shape[1] == width and frame.shape[0] == height:
+            return frame
+        return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+    def record(self, latency_ms):
+        """Feed one detection latency and adapt resolution/stride."""
+        if self._settling > 0:
+            self._settling -= 1
+            return
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += self.smoothing * (latency_ms - self.latency_ms)
+
+        latency = self.latency_ms
+        amortized = latency / self.stride
+
+        if latency > self.latency_budget_ms:
+            self._calm = 0
+            if self.level > 0:
+                self._change(level=self.level - 1)
+            elif self.stride < self.max_stride:
+                self._change(stride=self.stride + 1)
+        elif amortized > self.frame_budget_ms:
+            self._calm = 0
+            if self.stride < self.max_stride:
+                self._change(stride=self.stride + 1)
+            elif self.level > 0:
+                self._change(level=self.level - 1)
+        elif self._fits(latency, self.stride - 1) or self._fits(self._scaled(latency), self.stride):
+            self._calm += 1
+            if self._calm >= self.patience:
+                self._calm = 0
+                if self._fits(latency, self.stride - 1):
+                    self._change(stride=self.stride - 1)
+                else:
+                    self._change(level=self.level + 1)
+        else:
+            self._calm = 0
+
+    def _fits(self, latency, stride):
+        """True if a predicted latency leaves headroom at the given stride."""
+        if stride < 1 or latency is None:
+            return False
+        return latency < self.headroom * self.latency_budget_ms and \
+            latency / stride < self.headroom * self.frame_budget_ms
+
+    def _scaled(self, latency):
+        """Predict latency one resolution step up, assuming cost scales with pixel count."""
+        if self.level >= len(self.resolutions) - 1:
+            return None
+        (w0, h0), (w1, h1) = self.resolutions[self.level], self.resolutions[self.level + 1]
+        return latency * (w1 * h1) / (w0 * h0)
+
+    def _change(self, level=None, stride=None):
+        if level is not None:
+            self.level = level
+            self.latency_ms = None  # Old resolution's latency no longer applies
+        if stride is not None:
+            self.stride = stride
+        self.changes += 1
+        self._settling = self.cooldown
+
+    def stats(self):
+        """Current controller state."""
+        return {
+            'resolution': self.resolution,
+            'stride': self.stride,
+            'latency_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'latency_budget_ms': round(self.latency_budget_ms, 1),
+            'changes': self.changes
+        }
@@ -0,0 +1,131 @@
+"""
+Threaded Frame Capture
+Grabs camera frames on a background thread into a single-slot
+latest-frame buffer so slow detection never stalls capture
+"""
+
+import threading
+import time
+
+import cv2
+
+
+class LatestFrameCapture:
+    """
+    Wraps a cv2.VideoCapture with a reader thread.
+    The thread keeps overwriting one slot with the newest frame; read()
+    always returns the freshest frame not yet delivered, so end-to-end
+    latency stays around one detection time regardless of camera FPS.
+    Frames overwritten before being read are counted as dropped.
+    """
+
+    def __init__(self, source=0, max_failures=30):
+        """
+        Initialize the capture source.
+
+        Args:
+            source: Camera index, video path/URL, or an opened cv2.VideoCapture
+            max_failures (int): Consecutive failed reads before the stream is treated as ended
+        """
+        self.cap = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self.max_failures = max_failures
+
+        self.captured = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._frame = None
+        self._frame_id = 0
+        self._delivered_id = 0
+        self._captured_at = 0.0
+        self._ended = False
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        """Start the reader thread (returns self for chaining)."""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._reader, daemon=True)
+            self._thread.start()
+        return self
+
+    def _reader(self):
+        failures = 0
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                failures += 1
+                self.failed += 1
+                if failures >= self.max_failures:
+                    break
+                time.sleep(0.005)
+                continue
+            failures = 0
+
+            with self._cond:
+                if self._frame is not None and self._frame_id != self._delivered_id:
+                    self.dropped += 1
+                self._frame = frame
+                self._frame_id += 1
+                self._captured_at = time.monotonic()
+                self.captured += 1
+                self._cond.notify_all()
+
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+    def read(self, timeout=2.0):
+        """
+        Wait for a frame newer than the last one returned.
+
+        Args:
+            timeout (float): Seconds to wait for a fresh frame
+
+        Returns:
+            tuple: (ret, frame) like cv2.VideoCapture.read(); ret is False on timeout or end of stream
+        """
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            fresh = self._cond.wait_for(
+                lambda: self._frame_id != self._delivered_id or self._ended, timeout)
+            if not fresh or self._frame_id == self._delivered_id:
+                return False, None
+            self._delivered_id = self._frame_id
+            self.delivered += 1
+            return True, self._frame
+
+    def frame_age(self):
+        """Seconds since the newest frame was captured."""
+        with self._cond:
+            return time.monotonic() - self._captured_at if self._frame is not None else None
+
+    def stats(self):
+        """Capture counters."""
+        return {
+            'captured': self.captured,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'failed_reads': self.failed
+        }
+
+    def release(self):
+        """Stop the reader thread and release the camera."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.cap.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,120 @@
+"""
+Scene Change Gate
+Skips detection on static scenes by comparing a tiny grayscale thumbnail
+of each frame against the last processed one
+"""
+
+import threading
+
+import cv2
+
+
+class SceneChangeGate:
+    """
+    Cheap change detector placed in front of a detection call.
+    Each frame is reduced to a small grayscale thumbnail and compared with
+    the thumbnail of the last processed frame using block-wise mean
+    absolute difference. If no block changed by more than `threshold`
+    the previous result is reused; a refresh is still forced every
+    `refresh_interval` frames.
+    """
+
+    def __init__(self, thumb_size=(96, 72), grid=(12, 9), threshold=6.0, refresh_interval=30):
+        """
+        Initialize the gate.
+
+        Args:
+            thumb_size (tuple): (width, height) of the comparison thumbnail
+            grid (tuple): (columns, rows) of comparison blocks; must divide thumb_size
+            threshold (float): Mean absolute gray-level difference that marks a block as changed
+            refresh_interval (int): Max consecutive reused frames before forcing detection
+        """
+        if thumb_size[0] % grid[0] or thumb_size[1] % grid[1]:
+            raise ValueError("grid must evenly divide thumb_size")
+        self.thumb_size = thumb_size
+        self.grid = grid
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+
+        self.processed = 0
+        self.skipped = 0
+
+        self._reference = None
+        self._result = None
+        self._since_refresh = 0
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def block_difference(self, thumb):
+        """Largest per-block mean absolute difference against the reference thumbnail."""
+        cols, rows = self.grid
+        width, height = self.thumb_size
+        diff = cv2.absdiff(thumb, self._reference)
+        blocks = diff.reshape(rows, height // rows, cols, width // cols).mean(axis=(1, 3))
+        return float(blocks.max())
+
+    def run(self, frame, detect):
+        """
+        Run `detect(frame)` unless the scene is unchanged since the last processed frame.
+
+        Args:
+            frame: Input image
+            detect: Callable producing the detection result for a frame
+
+        Returns:
+            tuple: (result, reused) - reused is True when the cached result was returned
+        """
+        cached, thumb = self.check(frame)
+        if thumb is None:
+            return cached, True
+        result = detect(frame)
+        self.store(thumb, result)
+        return result, False
+    
+    def check(self, frame):
+        """
+        First half of run() for callers that batch detection themselves.
+        
+        Returns:
+            tuple: (cached_result, None) when the scene is unchanged, otherwise
+                   (None, thumb); pass thumb and the new result to store()
+        """
+        thumb = self._thumbnail(frame)
+        with self._lock:
+            static = (self._result is not None and
+                      self._since_refresh < self.refresh_interval and
+                      self.block_difference(thumb) <= self.threshold)
+            if static:
+                self._since_refresh += 1
+                self.skipped += 1
+                return self._result, None
+        return None, thumb
+    
+    def store(self, thumb, result):
+        """Record a fresh detection result for the frame check() returned thumb for."""
+        with self._lock:
+            self._reference = thumb
+            self._result = result
+            self._since_refresh = 0
+            self.processed += 1
+    
+    def reset(self):
+        """Forget the reference frame so the next frame is always processed."""
+        with self._lock:
+            self._reference = None
+            self._result = None
+            self._since_refresh = 0
+
+    def stats(self):
+        """Gate counters."""
+        total = self.processed + self.skipped
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skipped / total, 3) if total else 0.0
+        }
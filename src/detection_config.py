@@ -0,0 +1,200 @@
+"""
+Detection Configuration
+Loads config.ini into precompiled threshold snapshots and hot-reloads
+them when the file changes
+"""
+
+import os
+import threading
+import time
+import configparser
+
+import cv2
+import numpy as np
+
+from roi import CameraROI
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini')
+
+
+def _relative_to(config_path, value):
+    """Resolve a path option relative to the config file's directory (empty stays None)."""
+    if not value:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), value)
+
+
+class LightThresholds:
+    """
+    Immutable, precompiled HSV thresholds for traffic light colors.
+    Besides the (lower, upper) arrays used with cv2.inRange, each channel
+    gets a 256-entry lookup table of range bits, so a pixel matches a
+    color when lut_h[H] & lut_s[S] & lut_v[V] & bits[color] is non-zero.
+    """
+
+    COLORS = ('red', 'yellow', 'green')
+
+    def __init__(self, ranges, min_pixels):
+        """
+        Args:
+            ranges (dict): color -> list of (lower, upper) HSV triplets
+            min_pixels (int): Minimum matching pixels to report a light
+        """
+        self.ranges = {
+            color: tuple((np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+                         for lower, upper in ranges[color])
+            for color in self.COLORS
+        }
+        self.min_pixels = int(min_pixels)
+        self.luts, self.bits = self._compile_luts()
+
+    def _compile_luts(self):
+        luts = [np.zeros(256, dtype=np.uint8) for _ in range(3)]
+        bits = {}
+        bit = 0
+        for color in self.COLORS:
+            bits[color] = 0
+            for lower, upper in self.ranges[color]:
+                if bit >= 8:
+                    raise ValueError("At most 8 HSV ranges are supported")
+                for channel in range(3):
+                    luts[channel][lower[channel]:int(upper[channel]) + 1] |= 1 << bit
+                bits[color] |= 1 << bit
+                bit += 1
+        return tuple(luts), bits
+
+    def mask(self, hsv, color):
+        """Binary (0/255) mask of one color in an HSV image."""
+        ranges = self.ranges[color]
+        mask = cv2.inRange(hsv, *ranges[0])
+        for lower, upper in ranges[1:]:
+            mask |= cv2.inRange(hsv, lower, upper)
+        return mask
+
+
+class SignSettings:
+    """Immutable YOLO sign detector settings."""
+
+    def __init__(self, model='yolov8s.pt', confidence=0.35, iou_threshold=0.45, preprocessing=True,
+                 escalation_model=None, uncertain_band=(0.3, 0.6), classifier_model=None):
+        self.model = model
+        self.confidence = float(confidence)
+        self.iou_threshold = float(iou_threshold)
+        self.preprocessing = bool(preprocessing)
+        self.escalation_model = escalation_model or None
+        self.uncertain_band = (float(uncertain_band[0]), float(uncertain_band[1]))
+        self.classifier_model = classifier_model or None
+
+
+class DetectionConfig:
+    """One loaded snapshot of config.ini."""
+
+    def __init__(self, lights, signs, sections=None, mtime=None, cameras=None):
+        self.lights = lights
+        self.signs = signs
+        self.sections = sections or {}
+        self.mtime = mtime
+        self.cameras = cameras or {}
+
+    def camera_roi(self, camera_id):
+        """CameraROI from the [CAMERA:<camera_id>] section, or None."""
+        return self.cameras.get(str(camera_id))
+
+    @classmethod
+    def load(cls, path=DEFAULT_CONFIG_PATH):
+        """Parse config.ini into a snapshot (raises on missing or invalid values)."""
+        parser = configparser.ConfigParser(inline_comment_prefixes=('#', ';'))
+        parser.optionxform = str.upper
+        with open(path) as f:
+            parser.read_file(f)
+        mtime = os.path.getmtime(path)
+
+        tl = parser['TRAFFIC_LIGHTS']
+
+        def triplet(prefix):
+            return [tl.getint(f'{prefix}_{channel}') for channel in ('H', 'S', 'V')]
+
+        lights = LightThresholds({
+            'red': [(triplet('RED_LOWER1'), triplet('RED_UPPER1')),
+                    (triplet('RED_LOWER2'), triplet('RED_UPPER2'))],
+            'yellow': [(triplet('YELLOW_LOWER'), triplet('YELLOW_UPPER'))],
+            'green': [(triplet('GREEN_LOWER'), triplet('GREEN_UPPER'))],
+        }, tl.getint('MIN_PIXELS'))
+
+        ts = parser['TRAFFIC_SIGNS'] if parser.has_section('TRAFFIC_SIGNS') else {}
+        signs = SignSettings(
+            model=ts.get('MODEL', 'yolov8s.pt'),
+            confidence=ts.get('CONFIDENCE_THRESHOLD', 0.35),
+            iou_threshold=ts.get('IOU_THRESHOLD', 0.45),
+            preprocessing=str(ts.get('ENABLE_PREPROCESSING', 'true')).lower() in ('1', 'true', 'yes', 'on'),
+            escalation_model=ts.get('ESCALATION_MODEL', '').strip(),
+            uncertain_band=(ts.get('UNCERTAIN_LOW', 0.3), ts.get('UNCERTAIN_HIGH', 0.6)),
+            classifier_model=_relative_to(path, ts.get('CLASSIFIER_MODEL', '').strip()),
+        )
+
+        sections = {name: dict(parser[name]) for name in parser.sections()}
+        cameras = {
+            name.split(':', 1)[1].strip(): CameraROI.from_section(section)
+            for name, section in sections.items()
+            if name.upper().startswith('CAMERA:')
+        }
+        return cls(lights, signs, sections, mtime, cameras)
+
+
+class ConfigManager:
+    """
+    Shares the current DetectionConfig and hot-reloads it on file change.
+    current() stats the file at most once per check_interval; a changed
+    file is parsed into a new snapshot and swapped in atomically, so
+    in-flight detections keep the snapshot they started with. An invalid
+    file keeps the previous snapshot.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG_PATH, check_interval=1.0):
+        """
+        Args:
+            path (str): Path to config.ini
+            check_interval (float): Seconds between file modification checks
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._failed_mtime = None
+        self._config = DetectionConfig.load(path)
+
+    def current(self):
+        """Latest configuration snapshot."""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._last_check = now
+                self._reload_if_changed()
+            finally:
+                self._lock.release()
+        return self._config
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._config.mtime or mtime == self._failed_mtime:
+            return
+        try:
+            config = DetectionConfig.load(self.path)
+        except Exception as e:
+            self._failed_mtime = mtime
+            print(f"⚠️ Keeping previous config, could not reload {self.path}: {e}")
+            return
+        self._config = config
+        self.reloads += 1
+        print(f"🔄 Reloaded detection config from {self.path}")
+        for listener in self._listeners:
+            listener(config)
+
+    def add_listener(self, callback):
+        """Call `callback(config)` after every successful reload."""
+        self._listeners.append(callback)
@@ -0,0 +1,336 @@
+"""
+Detection Log
+Append-only binary log of per-frame detection results as fixed-size
+NumPy records, with a memory-mapped reader for time and class queries
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b'TLDLOG1\n'
+HEADER_SIZE = 4096  # Reserved so the vocabularies can grow in place
+
+LIGHT_STATES = ('none', 'red', 'yellow', 'green')
+DEFAULT_CLASSES = ('stop', 'yield', 'speed_limit', 'stop sign', 'traffic light')
+DEFAULT_STAGES = ('lights', 'signs', 'total')
+
+
+def record_dtype(max_boxes, stages):
+    """Structured dtype of one record (one frame of one camera)."""
+    return np.dtype([
+        ('timestamp', '<f8'),
+        ('camera', '<u2'),
+        ('light', 'u1'),
+        ('count', 'u1'),
+        ('cls', '<u2', (max_boxes,)),
+        ('conf', '<f4', (max_boxes,)),
+        ('box', '<i2', (max_boxes, 4)),
+        ('timings', '<f4', (len(stages),)),
+    ])
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a detection log (bad magic)")
+    length = int.from_bytes(f.read(4), 'little')
+    return json.loads(f.read(length).decode('utf-8'))
+
+
+def _header_bytes(header):
+    payload = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    blob = MAGIC + len(payload).to_bytes(4, 'little') + payload
+    if len(blob) > HEADER_SIZE:
+        raise ValueError("Detection log header full (too many classes or cameras)")
+    return blob.ljust(HEADER_SIZE, b'\0')
+
+
+class DetectionLogWriter:
+    """
+    Appends detection results to a log file.
+
+    Records are buffered and written in blocks of `flush_every`. Class
+    names and camera ids are stored as small integers; their vocabularies
+    live in the fixed-size header, which is rewritten in place when a new
+    name appears. Detections beyond `max_boxes` per frame keep only the
+    most confident ones. Opening an existing file appends to it.
+    """
+
+    def __init__(self, path, max_boxes=8, stages=DEFAULT_STAGES, classes=DEFAULT_CLASSES, flush_every=256):
+        """
+        Initialize the writer.
+
+        Args:
+            path (str): Log file path (created if missing)
+            max_boxes (int): Boxes stored per record (ignored when appending to an existing file)
+            stages (tuple): Timing stage names (ignored when appending)
+            classes (tuple): Initial class vocabulary
+            flush_every (int): Records buffered before writing
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                self.header = _read_header(f)
+            self._file = open(path, 'r+b')
+            itemsize = record_dtype(self.header['max_boxes'], self.header['stages']).itemsize
+            # Drop a partial record left by a crash mid-write
+            size = os.path.getsize(path)
+            self._file.truncate(HEADER_SIZE + (size - HEADER_SIZE) // itemsize * itemsize)
+        else:
+            self.header = {
+                'version': 1,
+                'max_boxes': max_boxes,
+                'stages': list(stages),
+                'light_states': list(LIGHT_STATES),
+                'classes': list(classes),
+                'cameras': []
+            }
+            self._file = open(path, 'w+b')
+            self._file.write(_header_bytes(self.header))
+
+        self.dtype = record_dtype(self.header['max_boxes'], self.header['stages'])
+        self._class_ids = {name: i for i, name in enumerate(self.header['classes'])}
+        self._camera_ids = {name: i for i, name in enumerate(self.header['cameras'])}
+        self._stage_index = {name: i for i, name in enumerate(self.header['stages'])}
+        self._buffer = np.zeros(flush_every, dtype=self.dtype)
+        self._pending = 0
+        self._header_dirty = False
+        self.records = 0
+
+    def _intern(self, table, key, name):
+        index = table.get(name)
+        if index is None:
+            index = len(self.header[key])
+            self.header[key].append(name)
+            table[name] = index
+            self._header_dirty = True
+        return index
+
+    def append(self, camera, light='none', detections=(), timings=None, timestamp=None):
+        """
+        Append one frame's results.
+
+        Args:
+            camera: Camera id (any value; stored via the header vocabulary)
+            light (str): Light state ('none', 'red', 'yellow', 'green')
+            detections: Iterable of (class_name, confidence, (x, y, w, h))
+            timings (dict): Stage name -> milliseconds (unknown stages are ignored)
+            timestamp (float): Seconds since the epoch (default: now)
+        """
+        max_boxes = self.header['max_boxes']
+        detections = sorted(detections, key=lambda d: -d[1])[:max_boxes]
+
+        with self._lock:
+            record = self._buffer[self._pending]
+            record['timestamp'] = time.time() if timestamp is None else timestamp
+            record['camera'] = self._intern(self._camera_ids, 'cameras', str(camera))
+            record['light'] = LIGHT_STATES.index(light) if light in LIGHT_STATES else 0
+            record['count'] = len(detections)
+            record['cls'] = 0
+            record['conf'] = 0
+            record['box'] = 0
+            record['timings'] = np.nan
+            for i, (name, confidence, box) in enumerate(detections):
+                record['cls'][i] = self._intern(self._class_ids, 'classes', str(name))
+                record['conf'][i] = confidence
+                record['box'][i] = np.clip(box, -32768, 32767)
+            for stage, ms in (timings or {}).items():
+                if stage in self._stage_index:
+                    record['timings'][self._stage_index[stage]] = ms
+
+            self._pending += 1
+            self.records += 1
+            if self._pending == self.flush_every:
+                self._flush_locked()
+
+    def append_result(self, camera, results, timestamp=None):
+        """Append a UnifiedTrafficDetector.detect_all() result dict (located lights log as light_<color>)."""
+        lights = results.get('lights') or {}
+        signs = results.get('signs') or {}
+        detections = [('light_' + light['type'], float(light['confidence']), light['box'])
+                      for light in lights.get('instances', [])]
+        for detection in signs.get('detections', []):
+            if 'bbox' in detection:
+                x1, y1, x2, y2 = detection['bbox']
+                box = (x1, y1, x2 - x1, y2 - y1)
+            elif 'box' in detection:
+                box = detection['box']
+            else:
+                continue
+            name = detection.get('sign', detection.get('type', 'unknown'))
+            detections.append((name, float(detection.get('confidence', 0.0)), box))
+        self.append(camera, lights.get('signal', 'none'), detections,
+                    results.get('timings'), timestamp)
+
+    def _flush_locked(self):
+        if self._header_dirty:
+            self._file.seek(0)
+            self._file.write(_header_bytes(self.header))
+            self._header_dirty = False
+        if self._pending:
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def flush(self):
+        """Write buffered records to disk."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def writer_from_config(config):
+    """
+    DetectionLogWriter for [LOGGING] DETECTION_LOG of a ConfigManager, or None
+    when logging is not configured.
+    """
+    if config is None:
+        return None
+    path = config.current().sections.get('LOGGING', {}).get('DETECTION_LOG', '').strip()
+    if not path:
+        return None
+    path = os.path.join(os.path.dirname(os.path.abspath(config.path)), path)
+    writer = DetectionLogWriter(path)
+    print(f"✅ Logging detections to {path}")
+    return writer
+
+
+class DetectionLogReader:
+    """
+    Memory-mapped view of a detection log.
+
+    Nothing is loaded up front: time ranges are found with a binary search
+    on the timestamp column (records are appended in time order), and
+    class/camera/light filters are vectorized over the selected slice only.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Log file written by DetectionLogWriter
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self.header = _read_header(f)
+        self.dtype = record_dtype(self.header['max_boxes'], self.header['stages'])
+        count = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+        self.classes = self.header['classes']
+        self.cameras = self.header['cameras']
+        self.stages = self.header['stages']
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def between(self, start=None, end=None):
+        """Records with start <= timestamp < end (a memmap slice, no copy when sorted)."""
+        timestamps = self.records['timestamp']
+        if self._sorted is None:
+            self._sorted = bool(np.all(timestamps[1:] >= timestamps[:-1])) if len(timestamps) else True
+        if not self._sorted:
+            keep = np.ones(len(timestamps), dtype=bool)
+            if start is not None:
+                keep &= timestamps >= start
+            if end is not None:
+                keep &= timestamps < end
+            return self.records[keep]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        return self.records[lo:hi]
+
+    def query(self, start=None, end=None, classes=None, camera=None, light=None, min_confidence=0.0):
+        """
+        Filter records by time range, class, camera and light state.
+
+        Args:
+            start, end (float): Time range in epoch seconds (end exclusive)
+            classes: Class name or list of names; a record matches if any of its
+                     boxes has one of them with confidence >= min_confidence
+            camera: Camera id
+            light (str): Light state
+            min_confidence (float): Minimum box confidence for the class filter
+
+        Returns:
+            numpy structured array of matching records
+        """
+        records = self.between(start, end)
+        keep = np.ones(len(records), dtype=bool)
+        if camera is not None:
+            if str(camera) not in self.cameras:
+                return records[:0]
+            keep &= records['camera'] == self.cameras.index(str(camera))
+        if light is not None:
+            keep &= records['light'] == LIGHT_STATES.index(light)
+        if classes is not None:
+            if isinstance(classes, str):
+                classes = [classes]
+            ids = [self.classes.index(c) for c in classes if c in self.classes]
+            slots = np.arange(self.header['max_boxes']) < records['count'][:, None]
+            hits = np.isin(records['cls'], ids) & slots & (records['conf'] >= min_confidence)
+            keep &= hits.any(axis=1)
+        return records[keep]
+
+    def class_counts(self, start=None, end=None):
+        """Number of boxes per class name in a time range."""
+        records = self.between(start, end)
+        slots = np.arange(self.header['max_boxes']) < records['count'][:, None]
+        counts = np.bincount(records['cls'][slots], minlength=len(self.classes))
+        return {name: int(n) for name, n in zip(self.classes, counts) if n}
+
+    def to_dicts(self, records):
+        """Decode records into plain dicts (for printing or JSON)."""
+        decoded = []
+        for record in records:
+            count = int(record['count'])
+            decoded.append({
+                'timestamp': float(record['timestamp']),
+                'camera': self.cameras[record['camera']],
+                'light': LIGHT_STATES[record['light']],
+                'detections': [
+                    {
+                        'class': self.classes[record['cls'][i]],
+                        'confidence': round(float(record['conf'][i]), 4),
+                        'box': tuple(int(v) for v in record['box'][i])
+                    }
+                    for i in range(count)
+                ],
+                'timings': {stage: float(ms) for stage, ms in zip(self.stages, record['timings'])
+                            if not np.isnan(ms)}
+            })
+        return decoded
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python src/detection_log.py <log> [class]
+    reader = DetectionLogReader(sys.argv[1])
+    print(f"📊 {len(reader)} records, cameras: {reader.cameras}")
+    print(f"   Boxes per class: {reader.class_counts()}")
+    if len(sys.argv) > 2:
+        matches = reader.query(classes=sys.argv[2])
+        print(f"   Frames with {sys.argv[2]}: {len(matches)}")
+        for record in reader.to_dicts(matches[-5:]):
+            print(f"   {record}")
@@ -0,0 +1,219 @@
+"""
+Detector Pool
+Fixed-size pool of detector instances checked out one per request, so
+threaded servers never share a model between concurrent calls
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+class PoolTimeout(TimeoutError):
+    """No detector became free within the checkout timeout."""
+
+
+def configure_threads(threads):
+    """
+    Cap intra-op threads of OpenCV and (when installed) PyTorch, so that
+    pool size x threads does not exceed the cores. Both settings are
+    process-wide.
+    """
+    threads = max(1, int(threads))
+    cv2.setNumThreads(threads)
+    if TORCH_AVAILABLE:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Only allowed before the first parallel operation
+    return threads
+
+
+class _Member:
+    """One pooled instance and its counters."""
+
+    def __init__(self, index, detector):
+        self.index = index
+        self.detector = detector
+        self.uses = 0
+        self.errors = 0
+        self.busy_ms = 0.0
+        self.in_use = False
+
+
+class DetectorPool:
+    """
+    Pool of up to `size` detectors built by `factory`.
+
+    Instances are created lazily (the first on warm()), handed out by
+    checkout() and returned when the `with` block ends; the most recently
+    returned instance is reused first to keep its caches warm. When all
+    instances are busy a checkout waits up to `timeout` seconds and then
+    raises PoolTimeout, so overload surfaces as an error instead of an
+    unbounded queue.
+    """
+
+    def __init__(self, factory, size=None, timeout=10.0, threads=None, name='detector'):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Callable returning a new detector instance
+            size (int): Maximum instances (default: min(4, CPU count))
+            timeout (float): Seconds a checkout waits for a free instance
+            threads (int): OpenCV/PyTorch threads per call (default: CPU count // size)
+            name (str): Label used in messages and stats
+        """
+        cores = os.cpu_count() or 1
+        self.factory = factory
+        self.size = max(1, size or min(4, cores))
+        self.timeout = timeout
+        self.name = name
+        self.threads = configure_threads(threads or max(1, cores // self.size))
+
+        self._idle = queue.LifoQueue()
+        self._members = []
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.wait_ms = 0.0
+
+    @classmethod
+    def from_env(cls, factory, name='detector', environ=None):
+        """Build a pool from DETECTOR_POOL_SIZE, DETECTOR_POOL_TIMEOUT and DETECTOR_THREADS."""
+        env = os.environ if environ is None else environ
+        return cls(
+            factory,
+            size=int(env.get('DETECTOR_POOL_SIZE', 0)) or None,
+            timeout=float(env.get('DETECTOR_POOL_TIMEOUT', 10)),
+            threads=int(env.get('DETECTOR_THREADS', 0)) or None,
+            name=name,
+        )
+
+    def warm(self, count=1):
+        """Create instances up front (e.g. to load models before the first request)."""
+        while len(self._members) < min(count, self.size):
+            self._idle.put(self._create())
+        return self
+
+    def _create(self):
+        with self._lock:
+            member = _Member(len(self._members), self.factory())
+            self._members.append(member)
+        return member
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = len(self._members) < self.size
+            if grow:
+                # Reserve the slot so concurrent checkouts cannot overshoot the size
+                self._members.append(None)
+        if grow:
+            try:
+                detector = self.factory()
+            except Exception:
+                with self._lock:
+                    self._members.remove(None)
+                raise
+            with self._lock:
+                index = self._members.index(None)
+                member = _Member(index, detector)
+                self._members[index] = member
+            return member
+        with self._lock:
+            self.waiting += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No free {self.name} within {timeout:.1f}s "
+                              f"({self.size} busy)") from None
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    @property
+    def saturated(self):
+        """True when a checkout made now would have to wait."""
+        return self._idle.empty() and len(self._members) >= self.size
+
+    def expected_wait_ms(self, service_ms):
+        """
+        Rough wait of a checkout made now: zero while an instance is free (or
+        can still be created), else the checkouts queued ahead spread over
+        the instances, each taking `service_ms`.
+        """
+        if not service_ms or not self.saturated:
+            return 0.0
+        return (self.waiting + 1) / self.size * service_ms
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Borrow a detector for the duration of a `with` block.
+
+        Args:
+            timeout (float): Override of the pool's wait timeout
+
+        Raises:
+            PoolTimeout: All instances stayed busy for the whole timeout
+        """
+        started = time.perf_counter()
+        member = self._acquire(self.timeout if timeout is None else timeout)
+        acquired = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms += (acquired - started) * 1000
+        member.in_use = True
+        try:
+            yield member.detector
+        except Exception:
+            member.errors += 1
+            raise
+        finally:
+            member.uses += 1
+            member.busy_ms += (time.perf_counter() - acquired) * 1000
+            member.in_use = False
+            self._idle.put(member)
+
+    def stats(self):
+        """Pool counters plus per-instance uses, errors and busy time."""
+        members = [m for m in self._members if m is not None]
+        return {
+            'name': self.name,
+            'size': self.size,
+            'created': len(members),
+            'in_use': sum(m.in_use for m in members),
+            'threads_per_call': self.threads,
+            'checkouts': self.checkouts,
+            'waiting': self.waiting,
+            'timeouts': self.timeouts,
+            'avg_wait_ms': round(self.wait_ms / self.checkouts, 2) if self.checkouts else 0.0,
+            'instances': [
+                {
+                    'index': m.index,
+                    'uses': m.uses,
+                    'errors': m.errors,
+                    'in_use': m.in_use,
+                    'avg_busy_ms': round(m.busy_ms / m.uses, 2) if m.uses else 0.0
+                }
+                for m in members
+            ]
+        }
@@ -0,0 +1,201 @@
+"""
+Fused Traffic Light Pixel Counter
+Counts red/yellow/green pixels (and optional per-row/column histograms)
+in one pass over the BGR buffer, without intermediate HSV or mask images.
+Uses Numba when installed; otherwise falls back to a NumPy/OpenCV path.
+"""
+
+import cv2
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# OpenCV's 8-bit BGR->HSV fixed-point tables (hsv_shift = 12)
+_HSV_SHIFT = 12
+_INDEX = np.arange(256, dtype=np.float64)
+SDIV_TABLE = np.zeros(256, dtype=np.int64)
+SDIV_TABLE[1:] = np.round((255 << _HSV_SHIFT) / _INDEX[1:])
+HDIV_TABLE = np.zeros(256, dtype=np.int64)
+HDIV_TABLE[1:] = np.round((180 << _HSV_SHIFT) / (6.0 * _INDEX[1:]))
+_NO_MASK = np.zeros((1, 1), dtype=np.uint8)
+
+
+def _fused_counts(frame, lut_h, lut_s, lut_v, bits, sdiv, hdiv, counts, rows, cols, with_hist,
+                  mask, with_mask):
+    """
+    Per-pixel kernel: integer BGR->HSV exactly as cv2.cvtColor(COLOR_BGR2HSV),
+    then range-bit lookup tables. Compiled with Numba when available.
+    """
+    height, width = frame.shape[0], frame.shape[1]
+    colors = bits.shape[0]
+    half = 1 << 11
+    for y in range(height):
+        for x in range(width):
+            if with_mask and mask[y, x] == 0:
+                continue
+            b = np.int64(frame[y, x, 0])
+            g = np.int64(frame[y, x, 1])
+            r = np.int64(frame[y, x, 2])
+            v = max(b, g, r)
+            code = lut_v[v]
+            if code == 0:
+                continue  # Too dark for every range: skip the rest of the conversion
+            diff = v - min(b, g, r)
+            s = (diff * sdiv[v] + half) >> 12
+            code &= lut_s[s]
+            if code == 0:
+                continue
+            if v == r:
+                h = g - b
+            elif v == g:
+                h = b - r + 2 * diff
+            else:
+                h = r - g + 4 * diff
+            h = (h * hdiv[diff] + half) >> 12
+            if h < 0:
+                h += 180
+
+            code &= lut_h[h]
+            if code == 0:
+                continue
+            for c in range(colors):
+                if code & bits[c]:
+                    counts[c] += 1
+                    if with_hist:
+                        rows[c, y] += 1
+                        cols[c, x] += 1
+
+
+if NUMBA_AVAILABLE:
+    _fused_counts = njit(cache=True, nogil=True)(_fused_counts)
+
+
+def count_light_pixels(frame, thresholds, histograms=False, use_numba=None, mask=None):
+    """
+    Count pixels of each traffic light color.
+
+    Args:
+        frame: BGR image (uint8)
+        thresholds: LightThresholds snapshot (see detection_config)
+        histograms (bool): Also return per-row and per-column counts
+        use_numba (bool): Force (True) or disable (False) the compiled kernel;
+                          default uses it when Numba is installed
+        mask: Optional uint8 mask of the frame's size; only non-zero pixels are counted
+
+    Returns:
+        dict: 'counts' (color -> int); with histograms also
+              'rows' and 'cols' (color -> 1-D int array)
+    """
+    colors = thresholds.COLORS
+    lut_h, lut_s, lut_v = thresholds.luts
+    if use_numba is None:
+        use_numba = NUMBA_AVAILABLE
+
+    if use_numba:
+        if not NUMBA_AVAILABLE:
+            raise RuntimeError("Numba is not installed")
+        height, width = frame.shape[:2]
+        bits = np.array([thresholds.bits[c] for c in colors], dtype=np.uint8)
+        counts = np.zeros(len(colors), dtype=np.int64)
+        rows = np.zeros((len(colors), height if histograms else 0), dtype=np.int64)
+        cols = np.zeros((len(colors), width if histograms else 0), dtype=np.int64)
+        _fused_counts(np.ascontiguousarray(frame), lut_h, lut_s, lut_v, bits,
+                      SDIV_TABLE, HDIV_TABLE, counts, rows, cols, histograms,
+                      mask if mask is not None else _NO_MASK, mask is not None)
+        result = {'counts': {c: int(n) for c, n in zip(colors, counts)}}
+        if histograms:
+            result['rows'] = dict(zip(colors, rows))
+            result['cols'] = dict(zip(colors, cols))
+        return result
+
+    # Fallback: one HSV conversion and one 3-channel LUT pass into a single code image
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    coded = cv2.LUT(hsv, _channel_lut(thresholds))
+    codes = cv2.bitwise_and(cv2.bitwise_and(coded[..., 0], coded[..., 1]), coded[..., 2])
+    if mask is not None:
+        codes = cv2.bitwise_and(codes, codes, mask=mask)
+
+    result = {'counts': {}}
+    if histograms:
+        result['rows'], result['cols'] = {}, {}
+    for color in colors:
+        hits = cv2.bitwise_and(codes, thresholds.bits[color])
+        result['counts'][color] = cv2.countNonZero(hits)
+        if histograms:
+            hits = hits != 0
+            result['rows'][color] = np.count_nonzero(hits, axis=1)
+            result['cols'][color] = np.count_nonzero(hits, axis=0)
+    return result
+
+
+def _channel_lut(thresholds):
+    """(256, 1, 3) table for cv2.LUT built from the snapshot's per-channel LUTs (cached on it)."""
+    table = getattr(thresholds, '_cv_lut', None)
+    if table is None:
+        table = np.ascontiguousarray(np.stack(thresholds.luts, axis=-1).reshape(256, 1, 3))
+        thresholds._cv_lut = table
+    return table
+
+
+def validate_against_detect_light(detector, frames, use_numba=None):
+    """
+    Check the fused counts against the detector's own masks.
+
+    Raw counts must equal cv2.inRange counts exactly. The light verdict is
+    also compared with detector.detect_light(); the fused path has no
+    morphological opening, so the report includes the agreement rate
+    rather than requiring it to be 1.0.
+
+    Returns:
+        dict: 'frames', 'count_mismatches', 'verdict_agreement', 'disagreements'
+    """
+    count_mismatches = 0
+    agreements = 0
+    disagreements = []
+    for index, frame in enumerate(frames):
+        thresholds = detector.thresholds()
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        exact = {c: cv2.countNonZero(thresholds.mask(hsv, c)) for c in thresholds.COLORS}
+        fused = count_light_pixels(frame, thresholds, use_numba=use_numba)['counts']
+        if fused != exact:
+            count_mismatches += 1
+
+        expected = detector.detect_light(frame)[0]
+        verdict = detector.classify_counts(fused['red'], fused['yellow'], fused['green'],
+                                           thresholds.min_pixels)
+        if verdict == expected:
+            agreements += 1
+        else:
+            disagreements.append((index, expected, verdict))
+
+    total = len(frames)
+    return {
+        'frames': total,
+        'count_mismatches': count_mismatches,
+        'verdict_agreement': agreements / total if total else 1.0,
+        'disagreements': disagreements
+    }
+
+
+if __name__ == "__main__":
+    import glob
+    import os
+    import time
+    from signal_detector import TrafficDetector
+
+    images_dir = os.path.join(os.path.dirname(__file__), '..', 'images')
+    frames = [cv2.imread(p) for p in sorted(glob.glob(os.path.join(images_dir, '*')))]
+    frames = [f for f in frames if f is not None]
+
+    detector = TrafficDetector()
+    print(f"Numba available: {NUMBA_AVAILABLE}")
+    print(validate_against_detect_light(detector, frames))
+
+    start = time.perf_counter()
+    for frame in frames:
+        count_light_pixels(frame, detector.thresholds())
+    print(f"Fused counts: {(time.perf_counter() - start) / len(frames) * 1000:.2f} ms/frame")
@@ -0,0 +1,165 @@
+"""
+Traffic Light State Tracker
+Smooths per-frame light verdicts over time and reports only state
+transitions (state, timestamp, dwell) instead of per-frame results
+"""
+
+import time
+from collections import Counter, deque
+
+
+class LightStateTracker:
+    """
+    Debounced light state on top of TrafficDetector.detect_light().
+
+    - A sliding window of the last `window` verdicts is majority-voted, so
+      single flickering frames (LED PWM, reflections) never change state.
+    - A color only changes to the next color of its cycle (default
+      red -> green -> yellow -> red), and only after the current state has
+      been held for its minimum dwell time.
+    - A vote for a color outside the cycle is held back; if it persists for
+      `resync_after_s` it is accepted anyway and flagged implausible (e.g. a
+      missed yellow phase).
+    - 'none' frames (occlusion, glare) keep the current color until no color
+      has been seen for `occlusion_timeout_s`.
+
+    update() returns an event dict only when the state changes, else None.
+    """
+
+    CYCLE = {'red': ('green',), 'green': ('yellow',), 'yellow': ('red',)}
+
+    def __init__(self, detector=None, window=7, min_votes=None, min_dwell_s=1.0,
+                 occlusion_timeout_s=2.0, resync_after_s=3.0, transitions=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            detector: Optional TrafficDetector used by process()
+            window (int): Number of recent verdicts voted on
+            min_votes (int): Votes a state needs to win the window (default: majority)
+            min_dwell_s (float or dict): Minimum time in a state before leaving it;
+                                         a dict maps state -> seconds
+            occlusion_timeout_s (float): Time without any color before reporting 'none'
+            resync_after_s (float): Time an out-of-cycle color must persist to be accepted
+            transitions (dict): state -> allowed next states (default: CYCLE)
+        """
+        self.detector = detector
+        self.window = window
+        self.min_votes = min_votes or window // 2 + 1
+        self.min_dwell_s = min_dwell_s
+        self.occlusion_timeout_s = occlusion_timeout_s
+        self.resync_after_s = resync_after_s
+        self.transitions = transitions or self.CYCLE
+
+        self.state = 'none'
+        self.since = None
+        self.frames = 0
+        self.events = 0
+        self.suppressed = 0
+
+        self._votes = deque(maxlen=window)
+        self._last_color_at = None
+        self._pending = None
+        self._pending_since = None
+
+    def process(self, frame, timestamp=None):
+        """Run the detector on a frame and feed its verdict to update()."""
+        if self.detector is None:
+            raise ValueError("LightStateTracker was created without a detector")
+        return self.update(self.detector.detect_light(frame)[0], timestamp)
+
+    def update(self, verdict, timestamp=None):
+        """
+        Feed one per-frame verdict ('red', 'yellow', 'green' or 'none').
+
+        Args:
+            verdict (str): Light verdict for the frame
+            timestamp (float): Frame time in seconds (default: time.time())
+
+        Returns:
+            dict: Transition event, or None if the state did not change
+        """
+        now = time.time() if timestamp is None else timestamp
+        self.frames += 1
+        if self.since is None:
+            self.since = now
+        self._votes.append(verdict)
+        if verdict != 'none':
+            self._last_color_at = now
+
+        candidate = self._vote()
+
+        # Occlusion: drop to 'none' only after a long run without any color
+        if candidate in (None, 'none'):
+            self._pending = None
+            if self.state != 'none' and self._last_color_at is not None and \
+                    now - self._last_color_at >= self.occlusion_timeout_s:
+                return self._change('none', now, plausible=True)
+            return None
+
+        if candidate == self.state:
+            self._pending = None
+            return None
+
+        # Acquiring a state after startup or occlusion: any color is plausible
+        if self.state == 'none':
+            return self._change(candidate, now, plausible=True)
+
+        if now - self.since < self._dwell(self.state):
+            self.suppressed += 1
+            return None
+
+        if candidate in self.transitions.get(self.state, ()):
+            return self._change(candidate, now, plausible=True)
+
+        # Out of cycle: wait until it has persisted long enough to trust
+        if self._pending != candidate:
+            self._pending, self._pending_since = candidate, now
+        if now - self._pending_since >= self.resync_after_s:
+            return self._change(candidate, now, plausible=False)
+        self.suppressed += 1
+        return None
+
+    def _vote(self):
+        """Window winner with at least min_votes, else None."""
+        if len(self._votes) < self.min_votes:
+            return None
+        state, votes = Counter(self._votes).most_common(1)[0]
+        return state if votes >= self.min_votes else None
+
+    def _dwell(self, state):
+        if isinstance(self.min_dwell_s, dict):
+            return self.min_dwell_s.get(state, 0.0)
+        return self.min_dwell_s
+
+    def _change(self, state, now, plausible):
+        event = {
+            'state': state,
+            'previous': self.state,
+            'timestamp': now,
+            'dwell': round(now - self.since, 3),
+            'plausible': plausible
+        }
+        self.state = state
+        self.since = now
+        self.events += 1
+        self._pending = None
+        return event
+
+    def reset(self):
+        """Forget all history (e.g. after the camera moved)."""
+        self._votes.clear()
+        self.state = 'none'
+        self.since = None
+        self._last_color_at = None
+        self._pending = None
+
+    def stats(self):
+        """Tracker counters."""
+        return {
+            'state': self.state,
+            'frames': self.frames,
+            'events': self.events,
+            'suppressed': self.suppressed,
+            'event_ratio': round(self.events / self.frames, 4) if self.frames else 0.0
+        }
@@ -0,0 +1,283 @@
+"""
+Multi-Camera Orchestrator
+Runs many capture sources against one shared UnifiedTrafficDetector,
+scheduling their frames fairly into batched inference calls
+"""
+
+import threading
+import time
+
+from capture import LatestFrameCapture
+from change_gate import SceneChangeGate
+from light_tracker import LightStateTracker
+from roi import CameraROI
+
+
+class CameraConfig:
+    """Settings for one camera feed."""
+
+    def __init__(self, camera_id, source, priority=1.0, target_fps=5.0, roi=None, skip_static=True):
+        """
+        Args:
+            camera_id (str): Name used in results and callbacks
+            source: Camera index, video path/URL, or an opened cv2.VideoCapture
+            priority (float): Relative share of inference slots when overloaded
+            target_fps (float): Maximum detections per second for this camera
+            roi: Optional CameraROI, (x, y, w, h) box or list of polygons to run
+                 detection on (default: the [CAMERA:<camera_id>] config section, if any)
+            skip_static (bool): Reuse the last result while the scene is unchanged
+        """
+        if priority <= 0 or target_fps <= 0:
+            raise ValueError("priority and target_fps must be positive")
+        self.camera_id = camera_id
+        self.source = source
+        self.priority = priority
+        self.target_fps = target_fps
+        self.roi = CameraROI.coerce(roi)
+        self.skip_static = skip_static
+
+
+class _Camera:
+    """Runtime state of one registered camera."""
+
+    def __init__(self, config, capture):
+        self.config = config
+        self.capture = capture
+        self.gate = SceneChangeGate() if config.skip_static else None
+        self.tracker = LightStateTracker()
+        self.next_due = 0.0
+        self.virtual_time = 0.0
+        self.processed = 0
+        self.reused = 0
+        self.latency_ms = None
+        self.last = None
+
+
+class MultiCameraOrchestrator:
+    """
+    Runs N cameras through one detector instance (one model in memory).
+
+    Every camera has its own LatestFrameCapture reader thread. A single
+    scheduler thread repeatedly collects the cameras that are due (their
+    target FPS interval has elapsed) and have a fresh frame, orders them by
+    weighted virtual time so each gets inference slots in proportion to its
+    priority, and sends up to `batch_size` frames to
+    detector.detect_batch() in one call. Unchanged scenes are answered from
+    each camera's SceneChangeGate without using a slot.
+
+    Results go to `on_result(camera_id, result)` and are kept per camera
+    for latest(). Each camera also feeds a LightStateTracker; consumers that
+    only need light changes can pass `on_event(camera_id, event)` instead.
+    """
+
+    def __init__(self, detector=None, batch_size=8, on_result=None, idle_sleep=0.005, config=None,
+                 on_event=None, recorder=None):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            detector: Shared UnifiedTrafficDetector (created with defaults if None)
+            batch_size (int): Max frames per inference call
+            on_result: Optional callback(camera_id, result) run on the scheduler thread
+            idle_sleep (float): Seconds to wait when no camera is ready
+            config: Optional ConfigManager; supplies (hot-reloaded) [CAMERA:<id>] ROIs
+                    for cameras configured without one
+            on_event: Optional callback(camera_id, event) for debounced light transitions
+            recorder: Optional DetectionLogWriter; every fresh (not reused) result is appended
+        """
+        if detector is None:
+            from unified_detector import UnifiedTrafficDetector
+            detector = UnifiedTrafficDetector()
+        self.detector = detector
+        self.batch_size = batch_size
+        self.on_result = on_result
+        self.on_event = on_event
+        self.recorder = recorder
+        self.idle_sleep = idle_sleep
+        self.config = config
+
+        self.batches = 0
+        self._cameras = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def add_camera(self, config):
+        """Register a camera (its capture starts immediately)."""
+        capture = LatestFrameCapture(config.source)
+        if not capture.isOpened():
+            print(f"⚠️ Camera {config.camera_id} not accessible")
+        camera = _Camera(config, capture.start())
+        with self._lock:
+            if config.camera_id in self._cameras:
+                capture.release()
+                raise ValueError(f"Camera {config.camera_id} already registered")
+            # Start at the current minimum so a new camera cannot starve the others
+            camera.virtual_time = min((c.virtual_time for c in self._cameras.values()), default=0.0)
+            self._cameras[config.camera_id] = camera
+        print(f"✅ Camera {config.camera_id} added")
+        return camera
+
+    def remove_camera(self, camera_id):
+        """Stop and forget a camera."""
+        with self._lock:
+            camera = self._cameras.pop(camera_id, None)
+        if camera is not None:
+            camera.capture.release()
+
+    def start(self):
+        """Start the scheduler thread (returns self for chaining)."""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop scheduling and release every camera."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        with self._lock:
+            cameras = list(self._cameras.values())
+            self._cameras.clear()
+        for camera in cameras:
+            camera.capture.release()
+
+    def _loop(self):
+        while self._running:
+            if self.step() == 0:
+                time.sleep(self.idle_sleep)
+
+    def step(self):
+        """
+        Run one scheduling round.
+
+        Returns:
+            int: Number of camera results emitted (fresh or reused)
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [c for c in self._cameras.values() if c.next_due <= now]
+        due.sort(key=lambda c: (c.virtual_time, -c.config.priority))
+
+        batch = []
+        emitted = 0
+        for camera in due:
+            if len(batch) >= self.batch_size:
+                break
+            ret, frame = camera.capture.read(timeout=0)
+            if not ret:
+                continue
+            camera.next_due = now + 1.0 / camera.config.target_fps
+            roi = self._roi(camera)
+
+            thumb = None
+            if camera.gate is not None:
+                # Only changes inside the ROI count as a scene change
+                cached, thumb = camera.gate.check(roi.crop(frame)[0] if roi is not None else frame)
+                if thumb is None:
+                    camera.reused += 1
+                    self._emit(camera, cached, reused=True)
+                    emitted += 1
+                    continue
+            batch.append((camera, frame, roi, thumb))
+
+        if not batch:
+            return emitted
+
+        started = time.perf_counter()
+        results = self.detector.detect_batch([item[1] for item in batch], rois=[item[2] for item in batch])
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+
+        for (camera, _, _, thumb), result in zip(batch, results):
+            if thumb is not None:
+                camera.gate.store(thumb, result)
+            camera.virtual_time += 1.0 / camera.config.priority
+            camera.processed += 1
+            camera.latency_ms = latency_ms
+            payload = self._emit(camera, result, reused=False)
+            if self.recorder is not None:
+                self.recorder.append_result(camera.config.camera_id, result, payload['timestamp'])
+        return emitted + len(batch)
+
+    def _emit(self, camera, result, reused):
+        payload = {
+            'camera_id': camera.config.camera_id,
+            'timestamp': time.time(),
+            'reused': reused,
+            'batch_latency_ms': camera.latency_ms,
+            'results': result
+        }
+        camera.last = payload
+        lights = result.get('lights') or {}
+        event = camera.tracker.update(lights.get('signal', 'none'), payload['timestamp'])
+        try:
+            if self.on_result is not None:
+                self.on_result(camera.config.camera_id, payload)
+            if event is not None and self.on_event is not None:
+                event['camera_id'] = camera.config.camera_id
+                self.on_event(camera.config.camera_id, event)
+        except Exception as e:
+            print(f"❌ Result callback failed for camera {camera.config.camera_id}: {e}")
+        return payload
+
+    def _roi(self, camera):
+        if camera.config.roi is not None or self.config is None:
+            return camera.config.roi
+        return self.config.current().camera_roi(camera.config.camera_id)
+
+    def latest(self, camera_id):
+        """Most recent result emitted for a camera (None before the first)."""
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+        return camera.last if camera is not None else None
+
+    def stats(self):
+        """Per-camera counters plus batch count."""
+        with self._lock:
+            cameras = list(self._cameras.values())
+        return {
+            'batches': self.batches,
+            'cameras': {
+                c.config.camera_id: {
+                    'processed': c.processed,
+                    'reused': c.reused,
+                    'priority': c.config.priority,
+                    'target_fps': c.config.target_fps,
+                    'batch_latency_ms': round(c.latency_ms, 1) if c.latency_ms is not None else None,
+                    'light': c.tracker.stats(),
+                    'capture': c.capture.stats()
+                }
+                for c in cameras
+            }
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python src/multi_camera.py <source> [<source> ...]
+    sources = sys.argv[1:] or ['0']
+
+    def show(camera_id, event):
+        print(f"[{camera_id}] {event['previous'].upper()} -> {event['state'].upper()} "
+              f"after {event['dwell']:.1f}s")
+
+    with MultiCameraOrchestrator(on_event=show) as orchestrator:
+        for index, source in enumerate(sources):
+            orchestrator.add_camera(CameraConfig(f"cam{index}", int(source) if source.isdigit() else source))
+        try:
+            while True:
+                time.sleep(5)
+                print(orchestrator.stats())
+        except KeyboardInterrupt:
+            pass
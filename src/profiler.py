@@ -0,0 +1,196 @@
+"""
+Sampling Profiler for the Detection API
+Captures stack samples of selected requests as collapsed stacks
+(flamegraph.pl / speedscope compatible) in a rotating local directory
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import itertools
+from collections import Counter
+from contextlib import contextmanager
+
+
+class ProfileSession:
+    """Stack sampler attached to a single request thread."""
+
+    def __init__(self, thread_id, interval, max_samples):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_samples = max_samples
+        self.stacks = Counter()
+        self.samples = 0
+        self.path = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+            if self.samples >= self.max_samples:
+                break
+
+    @staticmethod
+    def _collapse(frame):
+        """Turn a frame into 'outer;...;inner' collapsed-stack notation."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+class RequestProfiler:
+    """
+    Opt-in sampling profiler for request handlers.
+    A request is profiled when one of the triggers fires:
+      - every Nth request (sample_every)
+      - the 'X-Profile: 1' header (allow_header)
+      - the previous request exceeded slow_ms (arms the next request)
+    Only one request is profiled at a time, so the overhead is bounded
+    to a single sampler thread with a capped number of samples.
+    """
+
+    HEADER = 'X-Profile'
+
+    def __init__(self, sample_every=0, slow_ms=0, allow_header=False,
+                 output_dir=None, max_files=50, interval_ms=5,
+                 max_samples=2000, slow_cooldown_s=60):
+        """
+        Initialize the profiler.
+
+        Args:
+            sample_every (int): Profile 1-in-N requests (0 = disabled)
+            slow_ms (float): Latency that arms profiling of the next request (0 = disabled)
+            allow_header (bool): Honor the 'X-Profile: 1' request header
+            output_dir (str): Directory for .folded profiles
+            max_files (int): Number of profiles kept before the oldest is deleted
+            interval_ms (float): Stack sampling interval
+            max_samples (int): Upper bound on samples per request
+            slow_cooldown_s (float): Minimum delay between latency-triggered profiles
+        """
+        self.sample_every = sample_every
+        self.slow_ms = slow_ms
+        self.allow_header = allow_header
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), 'traffic_profiles')
+        self.max_files = max_files
+        self.interval = interval_ms / 1000.0
+        self.max_samples = max_samples
+        self.slow_cooldown_s = slow_cooldown_s
+
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+        self._armed = False
+        self._last_slow = 0.0
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """Build a profiler from PROFILE_* environment variables."""
+        env = os.environ if environ is None else environ
+        return cls(
+            sample_every=int(env.get('PROFILE_SAMPLE_EVERY', 0)),
+            slow_ms=float(env.get('PROFILE_SLOW_MS', 0)),
+            allow_header=env.get('PROFILE_ALLOW_HEADER', '0').lower() in ('1', 'true', 'yes'),
+            output_dir=env.get('PROFILE_DIR') or None,
+            max_files=int(env.get('PROFILE_MAX_FILES', 50)),
+            interval_ms=float(env.get('PROFILE_INTERVAL_MS', 5)),
+            max_samples=int(env.get('PROFILE_MAX_SAMPLES', 2000)),
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.sample_every or self.slow_ms or self.allow_header)
+
+    def should_profile(self, headers=None):
+        """
+        Decide whether the current request is profiled.
+
+        Returns:
+            str: Trigger reason ('header', 'sampled', 'slow') or None
+        """
+        if not self.enabled:
+            return None
+        if self.allow_header and headers is not None and headers.get(self.HEADER) == '1':
+            return 'header'
+        if self.sample_every and next(self._counter) % self.sample_every == 0:
+            return 'sampled'
+        if self._armed:
+            self._armed = False
+            return 'slow'
+        return None
+
+    def observe(self, elapsed_ms):
+        """Record a request latency; arms the next request if it was slow."""
+        if not self.slow_ms or elapsed_ms < self.slow_ms:
+            return
+        now = time.monotonic()
+        if now - self._last_slow >= self.slow_cooldown_s:
+            self._last_slow = now
+            self._armed = True
+
+    @contextmanager
+    def profile(self, reason, label='request'):
+        """
+        Sample the calling thread while the block runs.
+
+        Yields:
+            ProfileSession or None: None when not profiled (no reason or another profile is running)
+        """
+        if reason is None or not self._busy.acquire(blocking=False):
+            yield None
+            return
+
+        session = ProfileSession(threading.get_ident(), self.interval, self.max_samples)
+        started = time.time()
+        session.start()
+        try:
+            yield session
+        finally:
+            session.stop()
+            try:
+                session.path = self._write(session, reason, label, started)
+            except OSError as e:
+                print(f"⚠️ Could not write profile: {e}")
+            finally:
+                self._busy.release()
+
+    def _write(self, session, reason, label, started):
+        """Write collapsed stacks and drop the oldest files beyond max_files."""
+        if not session.stacks:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+        name = f"{label}-{stamp}-{int(started * 1000) % 1000:03d}-{reason}.folded"
+        path = os.path.join(self.output_dir, name)
+        with open(path, 'w') as f:
+            for stack, count in session.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self._rotate()
+        return path
+
+    def _rotate(self):
+        files = [os.path.join(self.output_dir, n) for n in os.listdir(self.output_dir)
+                 if n.endswith('.folded')]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
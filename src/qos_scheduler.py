@@ -0,0 +1,226 @@
+"""
+QoS Scheduler
+Admission queue in front of the detectors with priority classes, so live
+webcam frames are not starved by bulk uploads, batches and video jobs
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class QueueTimeout(TimeoutError):
+    """A request waited longer than its timeout for a detection slot."""
+
+
+class RequestDropped(Exception):
+    """A queued request was dropped (stale, superseded, or the queue was full)."""
+
+    def __init__(self, reason):
+        super().__init__(f"Request dropped: {reason}")
+        self.reason = reason
+
+
+class QoSClass:
+    """One priority class: its queue, scheduling parameters and metrics."""
+
+    def __init__(self, name, weight=1.0, max_age_ms=None, max_queue=0, max_running=None):
+        """
+        Args:
+            name (str): Class name ('live', 'bulk', ...)
+            weight (float): Share of the slots when several classes are waiting
+            max_age_ms (float): Drop queued requests older than this (None = wait for the timeout)
+            max_queue (int): Queue length cap (0 = unbounded); a full queue drops its
+                             oldest entry when max_age_ms is set, else rejects the new one
+            max_running (int): Slots the class may hold at once (None = all)
+        """
+        self.name = name
+        self.weight = weight
+        self.max_age_ms = max_age_ms
+        self.max_queue = max_queue
+        self.max_running = max_running
+
+        self.queue = deque()
+        self.running = 0
+        self.pass_value = 0.0  # Stride-scheduling virtual time
+        self.admitted = 0
+        self.completed = 0
+        self.dropped = {'stale': 0, 'superseded': 0, 'queue_full': 0}
+        self.timeouts = 0
+        self.max_depth = 0
+        self._waits = deque(maxlen=512)
+        self._service_ms = 0.0
+
+    def stats(self):
+        waits = sorted(self._waits)
+        return {
+            'weight': self.weight,
+            'queued': len(self.queue),
+            'running': self.running,
+            'max_depth': self.max_depth,
+            'admitted': self.admitted,
+            'completed': self.completed,
+            'dropped': dict(self.dropped),
+            'timeouts': self.timeouts,
+            'avg_wait_ms': round(sum(waits) / len(waits), 2) if waits else 0.0,
+            'p95_wait_ms': round(waits[math.ceil(0.95 * len(waits)) - 1], 2) if waits else 0.0,
+            'avg_service_ms': round(self._service_ms / self.completed, 2) if self.completed else 0.0
+        }
+
+
+class _Ticket:
+    def __init__(self, qos_class, key):
+        self.qos_class = qos_class
+        self.key = key
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.dropped = None
+
+
+class QoSScheduler:
+    """
+    Grants a fixed number of detection slots to queued requests.
+
+    When several classes are waiting, the next slot goes to the class
+    that has received the least service relative to its weight (stride
+    scheduling), so live frames get most slots without starving bulk
+    work; a class given a very large weight behaves as strict priority.
+    Live requests are drop-if-stale: a queued frame is dropped once it is
+    older than max_age_ms, or as soon as a newer frame of the same stream
+    arrives. Bulk work can be capped below the slot count so a slot stays
+    free for live frames.
+    """
+
+    def __init__(self, slots, classes, timeout=30.0):
+        """
+        Args:
+            slots (int): Requests detected at once (usually the detector pool size)
+            classes (list): QoSClass instances
+            timeout (float): Default seconds a request may wait for a slot
+        """
+        self.slots = max(1, slots)
+        self.classes = {qos_class.name: qos_class for qos_class in classes}
+        self.timeout = timeout
+        self.running = 0
+        self._virtual_time = 0.0  # Pass value of the latest grant
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls, slots, environ=None):
+        """
+        Live + bulk scheduler from QOS_* environment variables: QOS_LIVE_WEIGHT,
+        QOS_BULK_WEIGHT, QOS_LIVE_MAX_AGE_MS, QOS_LIVE_MAX_QUEUE, QOS_LIVE_RESERVED
+        (slots bulk work leaves free) and QOS_TIMEOUT.
+        """
+        env = os.environ if environ is None else environ
+        reserved = int(env.get('QOS_LIVE_RESERVED', 1))
+        return cls(slots, [
+            QoSClass('live',
+                     weight=float(env.get('QOS_LIVE_WEIGHT', 8)),
+                     max_age_ms=float(env.get('QOS_LIVE_MAX_AGE_MS', 250)),
+                     max_queue=int(env.get('QOS_LIVE_MAX_QUEUE', 2 * slots))),
+            QoSClass('bulk',
+                     weight=float(env.get('QOS_BULK_WEIGHT', 1)),
+                     max_running=max(1, slots - reserved))
+        ], timeout=float(env.get('QOS_TIMEOUT', 30)))
+
+    @contextmanager
+    def slot(self, class_name, key=None, timeout=None):
+        """
+        Wait for a detection slot and hold it for the `with` block.
+
+        Args:
+            class_name (str): QoS class of the request
+            key (str): Stream id; a newer live request with the same key drops this one
+            timeout (float): Override of the scheduler's wait timeout
+
+        Raises:
+            RequestDropped: Dropped while queued (stale, superseded, queue full)
+            QueueTimeout: No slot within the timeout
+        """
+        qos_class = self.classes[class_name]
+        self._wait(_Ticket(qos_class, key), self.timeout if timeout is None else timeout)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.running -= 1
+                qos_class.running -= 1
+                qos_class.completed += 1
+                qos_class._service_ms += (time.perf_counter() - started) * 1000
+                self._dispatch()
+
+    def _wait(self, ticket, timeout):
+        qos_class = ticket.qos_class
+        with self._cond:
+            if ticket.key is not None and qos_class.max_age_ms is not None:
+                for queued in [t for t in qos_class.queue if t.key == ticket.key]:
+                    self._drop(queued, 'superseded')
+            if qos_class.max_queue and len(qos_class.queue) >= qos_class.max_queue:
+                if qos_class.max_age_ms is None:
+                    qos_class.dropped['queue_full'] += 1
+                    raise RequestDropped('queue_full')
+                self._drop(qos_class.queue[0], 'queue_full')
+            if not qos_class.queue and not qos_class.running:
+                # A class returning from idle does not bank credit for the idle time
+                qos_class.pass_value = max(qos_class.pass_value, self._virtual_time)
+            qos_class.queue.append(ticket)
+            qos_class.max_depth = max(qos_class.max_depth, len(qos_class.queue))
+            self._dispatch()
+
+            give_up = ticket.enqueued + timeout
+            while not ticket.granted and ticket.dropped is None:
+                now = time.perf_counter()
+                limit = give_up
+                if qos_class.max_age_ms is not None:
+                    stale = ticket.enqueued + qos_class.max_age_ms / 1000
+                    if now >= stale:
+                        self._drop(ticket, 'stale')
+                        break
+                    limit = min(limit, stale)
+                if now >= give_up:
+                    qos_class.queue.remove(ticket)
+                    qos_class.timeouts += 1
+                    raise QueueTimeout(f"No detection slot for '{qos_class.name}' within {timeout:.1f}s")
+                self._cond.wait(limit - now)
+
+            if ticket.dropped is not None:
+                raise RequestDropped(ticket.dropped)
+            qos_class._waits.append((time.perf_counter() - ticket.enqueued) * 1000)
+            return ticket
+
+    def _drop(self, ticket, reason):
+        ticket.qos_class.queue.remove(ticket)
+        ticket.qos_class.dropped[reason] += 1
+        ticket.dropped = reason
+        self._cond.notify_all()
+
+    def _dispatch(self):
+        """Grant free slots to waiting classes in weighted order (lock held)."""
+        while self.running < self.slots:
+            ready = [c for c in self.classes.values()
+                     if c.queue and (c.max_running is None or c.running < c.max_running)]
+            if not ready:
+                return
+            qos_class = min(ready, key=lambda c: c.pass_value)
+            ticket = qos_class.queue.popleft()
+            ticket.granted = True
+            self._virtual_time = qos_class.pass_value
+            qos_class.pass_value += 1.0 / qos_class.weight
+            qos_class.running += 1
+            qos_class.admitted += 1
+            self.running += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        """Slot usage plus queue depth, drops and wait percentiles per class."""
+        with self._cond:
+            return {
+                'slots': self.slots,
+                'running': self.running,
+                'classes': {name: qos_class.stats() for name, qos_class in self.classes.items()}
+            }
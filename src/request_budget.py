@@ -0,0 +1,147 @@
+"""
+Request Latency Budget
+Per-request deadlines and a running latency model of the detection stages,
+used to degrade the pipeline (cheaper detector, no annotated image, lower
+resolution) instead of overrunning the budget
+"""
+
+import os
+import threading
+import time
+
+# Degradations in the order they are applied
+DEGRADATIONS = ('hsv_signs', 'no_image', 'downscale')
+
+
+class Deadline:
+    """Time budget of one request and the degradations applied to meet it."""
+
+    def __init__(self, budget_ms, started=None):
+        """
+        Args:
+            budget_ms (float): Milliseconds the request may take in total
+            started (float): time.perf_counter() value the budget counts from (default: now)
+        """
+        self.budget_ms = float(budget_ms)
+        self.started = time.perf_counter() if started is None else started
+        self.degraded = []
+        self.reserve_ms = 0.0  # Kept back from waits for a cheaper fallback
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def remaining_ms(self):
+        return self.budget_ms - self.elapsed_ms()
+
+    @property
+    def expired(self):
+        return self.remaining_ms() <= 0
+
+    def wait_timeout(self, default):
+        """Seconds a blocking wait may take: the smaller of `default` and the time left (minus the reserve)."""
+        return max(0.001, min(default, (self.remaining_ms() - self.reserve_ms) / 1000))
+
+    def degrade(self, step):
+        """Record a degradation (once, in DEGRADATIONS order)."""
+        if step not in self.degraded:
+            self.degraded.append(step)
+            self.degraded.sort(key=DEGRADATIONS.index)
+
+    def report(self):
+        """Fields added to the response."""
+        return {
+            'deadline_ms': round(self.budget_ms, 1),
+            'elapsed_ms': round(self.elapsed_ms(), 1),
+            'degraded': list(self.degraded)
+        }
+
+
+class LatencyModel:
+    """
+    Exponential moving averages of stage latencies. Stages observed with a
+    pixel count are tracked per megapixel, so their estimate scales with
+    the image size (and with a downscale); others are tracked as-is.
+    Thread-safe.
+    """
+
+    def __init__(self, smoothing=0.2):
+        """
+        Args:
+            smoothing (float): EMA factor (0-1, higher = faster reaction)
+        """
+        self.smoothing = smoothing
+        self._averages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, ms, pixels=None):
+        """Record one measured stage latency (pixels: image size for size-dependent stages)."""
+        value = ms / (pixels / 1e6) if pixels else ms
+        with self._lock:
+            previous = self._averages.get(stage)
+            self._averages[stage] = value if previous is None else \
+                previous + self.smoothing * (value - previous)
+
+    def estimate(self, stage, pixels=None):
+        """Expected milliseconds for a stage, or None before its first observation."""
+        value = self._averages.get(stage)
+        if value is None:
+            return None
+        return value * pixels / 1e6 if pixels else value
+
+    def stats(self):
+        with self._lock:
+            return {stage: round(value, 2) for stage, value in self._averages.items()}
+
+
+class DeadlinePolicy:
+    """
+    Server-side deadline settings: a default budget for every request
+    (0 = none) that clients can override per request, and the smallest
+    width a downscale may go to.
+    """
+
+    HEADER = 'X-Deadline-Ms'
+    FIELD = 'deadline_ms'
+
+    def __init__(self, default_ms=0, min_width=320, max_ms=60000):
+        """
+        Args:
+            default_ms (float): Budget of requests that do not set one (0 = no deadline)
+            min_width (int): Smallest image width a 'downscale' degradation produces
+            max_ms (float): Largest budget a client may ask for
+        """
+        self.default_ms = default_ms
+        self.min_width = min_width
+        self.max_ms = max_ms
+        self.latency = LatencyModel()
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """Build a policy from DETECT_DEADLINE_MS and DETECT_MIN_WIDTH."""
+        env = os.environ if environ is None else environ
+        return cls(
+            default_ms=float(env.get('DETECT_DEADLINE_MS', 0)),
+            min_width=int(env.get('DETECT_MIN_WIDTH', 320)),
+        )
+
+    def deadline(self, headers=None, form=None, started=None):
+        """
+        Deadline of a request from the X-Deadline-Ms header or deadline_ms
+        form field, else the server default.
+
+        Returns:
+            Deadline: Or None when neither sets a budget
+
+        Raises:
+            ValueError: Budget is not a positive number
+        """
+        value = (headers or {}).get(self.HEADER) or (form or {}).get(self.FIELD)
+        try:
+            budget_ms = float(value) if value else self.default_ms
+        except ValueError:
+            budget_ms = float('nan')
+        if value and not 0 < budget_ms:
+            raise ValueError(f"{self.HEADER} must be a positive number of milliseconds")
+        if not budget_ms:
+            return None
+        return Deadline(min(budget_ms, self.max_ms), started=started)
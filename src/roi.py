@@ -0,0 +1,154 @@
+"""
+Camera Regions of Interest
+Per-camera polygon ROIs precomputed into a bounding crop and a mask,
+so detectors only process the parts of a fixed view where lights and
+signs can appear
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+class CameraROI:
+    """
+    Polygon regions of interest for one fixed camera.
+
+    Polygons are given in pixels of `reference_size` (or of the frame
+    itself when no reference size is set). For every frame size seen, the
+    polygons are rasterized once into the union's bounding box and a mask
+    over that box; crop() then returns a view of the frame plus the mask.
+    The mask is None when the polygons fill their bounding box (plain
+    rectangles), so callers can skip masking entirely.
+    """
+
+    def __init__(self, polygons, reference_size=None):
+        """
+        Args:
+            polygons: List of polygons, each a list of (x, y) points
+            reference_size (tuple): (width, height) the points refer to; frames of
+                                    another size get the polygons scaled to fit
+        """
+        self.polygons = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons]
+        if not self.polygons or any(len(p) < 3 for p in self.polygons):
+            raise ValueError("Each ROI polygon needs at least 3 points")
+        self.reference_size = tuple(reference_size) if reference_size else None
+        self._regions = {}
+        self._scaled_masks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_box(cls, box):
+        """Rectangular ROI from (x, y, w, h)."""
+        x, y, w, h = box
+        return cls([[(x, y), (x + w, y), (x + w, y + h), (x, y + h)]])
+
+    @classmethod
+    def from_section(cls, section):
+        """
+        Build from a [CAMERA:<id>] config section.
+
+        Every option starting with POLYGON is one polygon written as
+        space-separated x,y points; optional SIZE = <width>x<height> is the
+        frame size those points refer to.
+        """
+        polygons = []
+        for key in sorted(section):
+            if key.upper().startswith('POLYGON'):
+                points = [tuple(float(v) for v in point.split(',')) for point in section[key].split()]
+                if any(len(point) != 2 for point in points):
+                    raise ValueError(f"{key}: points must be written as x,y")
+                polygons.append(points)
+        size = section.get('SIZE')
+        reference_size = tuple(int(v) for v in size.lower().split('x')) if size else None
+        return cls(polygons, reference_size)
+
+    @classmethod
+    def coerce(cls, roi):
+        """Accept a CameraROI, an (x, y, w, h) box or a list of polygons."""
+        if roi is None or isinstance(roi, cls):
+            return roi
+        if len(roi) == 4 and all(np.isscalar(v) for v in roi):
+            return cls.from_box(roi)
+        return cls(roi)
+
+    def region(self, frame_size):
+        """
+        Precomputed (box, mask) for a frame size.
+
+        Returns:
+            tuple: (x, y, w, h) bounding box clipped to the frame, and a uint8 0/255
+                   mask of the box (None if the polygons fill the whole box)
+        """
+        region = self._regions.get(frame_size)
+        if region is None:
+            with self._lock:
+                region = self._regions.get(frame_size)
+                if region is None:
+                    region = self._compile(frame_size)
+                    self._regions[frame_size] = region
+        return region
+
+    def _compile(self, frame_size):
+        width, height = frame_size
+        if self.reference_size:
+            factor = np.array([width / self.reference_size[0], height / self.reference_size[1]])
+        else:
+            factor = np.ones(2)
+        polygons = [np.round(p * factor).astype(np.int32) for p in self.polygons]
+
+        full = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(full, polygons, 255)
+        points = cv2.findNonZero(full)
+        if points is None:
+            raise ValueError(f"ROI lies outside the {width}x{height} frame")
+        x, y, w, h = cv2.boundingRect(points)
+        mask = full[y:y + h, x:x + w].copy()
+        if cv2.countNonZero(mask) == w * h:
+            mask = None
+        return (x, y, w, h), mask
+
+    def crop(self, frame):
+        """
+        Cut the ROI out of a frame.
+
+        Returns:
+            tuple: (crop view, mask or None, (x, y) offset of the crop in the frame)
+        """
+        (x, y, w, h), mask = self.region((frame.shape[1], frame.shape[0]))
+        return frame[y:y + h, x:x + w], mask, (x, y)
+
+    def mask_for(self, mask, shape):
+        """A crop mask resized to a reduced image shape (cached, for pyramid levels)."""
+        if mask is None or mask.shape[:2] == shape[:2]:
+            return mask
+        key = (id(mask), shape[:2])
+        scaled = self._scaled_masks.get(key)
+        if scaled is None:
+            scaled = cv2.resize(mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+            self._scaled_masks[key] = scaled
+        return scaled
+
+    def contains(self, x, y, frame_size):
+        """True if full-frame point (x, y) lies inside the ROI."""
+        (bx, by, bw, bh), mask = self.region(frame_size)
+        if not (bx <= x < bx + bw and by <= y < by + bh):
+            return False
+        return mask is None or mask[int(y) - by, int(x) - bx] > 0
+
+    def contains_points(self, xs, ys, frame_size):
+        """Vectorized contains() for integer arrays of full-frame points (boolean array)."""
+        (bx, by, bw, bh), mask = self.region(frame_size)
+        xs = np.asarray(xs, dtype=np.int64) - bx
+        ys = np.asarray(ys, dtype=np.int64) - by
+        inside = (xs >= 0) & (xs < bw) & (ys >= 0) & (ys < bh)
+        if mask is not None:
+            inside[inside] = mask[ys[inside], xs[inside]] > 0
+        return inside
+
+    def coverage(self, frame_size):
+        """Fraction of the frame's pixels inside the ROI."""
+        (_, _, w, h), mask = self.region(frame_size)
+        inside = w * h if mask is None else cv2.countNonZero(mask)
+        return inside / float(frame_size[0] * frame_size[1])
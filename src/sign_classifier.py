@@ -0,0 +1,276 @@
+"""
+Traffic Sign Classifier
+Compact multi-class sign classifier for crops (HOG + color features and a
+linear softmax model), trained offline with utils/train_classifier.py
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+# GTSRB class ids -> (type, display name)
+SIGN_CLASSES = (
+    ('speed_limit_20', 'SPEED LIMIT 20'),
+    ('speed_limit_30', 'SPEED LIMIT 30'),
+    ('speed_limit_50', 'SPEED LIMIT 50'),
+    ('speed_limit_60', 'SPEED LIMIT 60'),
+    ('speed_limit_70', 'SPEED LIMIT 70'),
+    ('speed_limit_80', 'SPEED LIMIT 80'),
+    ('end_speed_limit_80', 'END OF SPEED LIMIT 80'),
+    ('speed_limit_100', 'SPEED LIMIT 100'),
+    ('speed_limit_120', 'SPEED LIMIT 120'),
+    ('no_passing', 'NO PASSING'),
+    ('no_passing_trucks', 'NO PASSING (TRUCKS)'),
+    ('right_of_way', 'RIGHT OF WAY AT NEXT INTERSECTION'),
+    ('priority_road', 'PRIORITY ROAD'),
+    ('yield', 'YIELD SIGN'),
+    ('stop', 'STOP SIGN'),
+    ('no_vehicles', 'NO VEHICLES'),
+    ('no_trucks', 'NO TRUCKS'),
+    ('no_entry', 'NO ENTRY'),
+    ('general_caution', 'GENERAL CAUTION'),
+    ('curve_left', 'DANGEROUS CURVE LEFT'),
+    ('curve_right', 'DANGEROUS CURVE RIGHT'),
+    ('double_curve', 'DOUBLE CURVE'),
+    ('bumpy_road', 'BUMPY ROAD'),
+    ('slippery_road', 'SLIPPERY ROAD'),
+    ('road_narrows', 'ROAD NARROWS'),
+    ('road_work', 'ROAD WORK'),
+    ('traffic_signals', 'TRAFFIC SIGNALS AHEAD'),
+    ('pedestrians', 'PEDESTRIANS'),
+    ('children_crossing', 'CHILDREN CROSSING'),
+    ('bicycles_crossing', 'BICYCLES CROSSING'),
+    ('ice_snow', 'BEWARE OF ICE/SNOW'),
+    ('animals_crossing', 'WILD ANIMALS CROSSING'),
+    ('end_all_limits', 'END OF ALL LIMITS'),
+    ('turn_right', 'TURN RIGHT AHEAD'),
+    ('turn_left', 'TURN LEFT AHEAD'),
+    ('ahead_only', 'AHEAD ONLY'),
+    ('straight_or_right', 'GO STRAIGHT OR RIGHT'),
+    ('straight_or_left', 'GO STRAIGHT OR LEFT'),
+    ('keep_right', 'KEEP RIGHT'),
+    ('keep_left', 'KEEP LEFT'),
+    ('roundabout', 'ROUNDABOUT'),
+    ('end_no_passing', 'END OF NO PASSING'),
+    ('end_no_passing_trucks', 'END OF NO PASSING (TRUCKS)'),
+)
+SIGN_NAMES = dict(SIGN_CLASSES)
+
+# Training folders with this name hold non-sign crops (rejected proposals)
+BACKGROUND = 'background'
+
+FEATURE_SIZE = 32
+_CELL = 8
+_ORIENTATIONS = 9
+_HUE_BINS = 6
+
+
+def class_key(folder_name):
+    """Class type for a training folder: GTSRB ids (0-42 or 00042) map to SIGN_CLASSES."""
+    if folder_name.isdigit() and int(folder_name) < len(SIGN_CLASSES):
+        return SIGN_CLASSES[int(folder_name)][0]
+    return folder_name.strip().lower().replace(' ', '_')
+
+
+def display_name(key):
+    return SIGN_NAMES.get(key, key.replace('_', ' ').upper())
+
+
+def _hog(gray):
+    """
+    HOG descriptors of a stack of equally sized grayscale images (N, S, S):
+    unsigned gradient orientations in 8x8-pixel cells, L2-normalized over
+    2x2-cell blocks with a one-cell stride. Computed for the whole stack at
+    once (no per-image OpenCV HOGDescriptor, which not every build ships).
+    """
+    gx = np.zeros_like(gray)
+    gy = np.zeros_like(gray)
+    gx[:, :, 1:-1] = gray[:, :, 2:] - gray[:, :, :-2]
+    gy[:, 1:-1, :] = gray[:, 2:, :] - gray[:, :-2, :]
+    magnitude = np.hypot(gx, gy)
+    orientation = (np.rad2deg(np.arctan2(gy, gx)) % 180.0) * (_ORIENTATIONS / 180.0)
+    bins = np.minimum(orientation.astype(np.int32), _ORIENTATIONS - 1)
+
+    n, size = gray.shape[0], gray.shape[1]
+    cells = size // _CELL
+    votes = (bins[..., None] == np.arange(_ORIENTATIONS)) * magnitude[..., None]
+    histogram = votes.reshape(n, cells, _CELL, cells, _CELL, _ORIENTATIONS).sum(axis=(2, 4))
+
+    blocks = np.concatenate([histogram[:, :-1, :-1], histogram[:, :-1, 1:],
+                             histogram[:, 1:, :-1], histogram[:, 1:, 1:]], axis=-1)
+    blocks /= np.sqrt((blocks ** 2).sum(axis=-1, keepdims=True) + 1e-6)
+    return blocks.reshape(n, -1)
+
+
+def extract_features(crops):
+    """
+    Feature matrix for a list of BGR crops: HOG of the grayscale crop
+    resized to 32x32, plus a hue histogram of saturated pixels and the
+    white and dark pixel fractions (sign color is a strong cue HOG ignores).
+
+    Returns:
+        numpy.ndarray: float32 array of shape (len(crops), n_features)
+    """
+    small = np.stack([cv2.resize(crop, (FEATURE_SIZE, FEATURE_SIZE), interpolation=cv2.INTER_AREA)
+                      for crop in crops])
+    flat = small.reshape(-1, FEATURE_SIZE, 3)
+    gray = cv2.cvtColor(flat, cv2.COLOR_BGR2GRAY).reshape(len(crops), FEATURE_SIZE, FEATURE_SIZE)
+    hsv = cv2.cvtColor(flat, cv2.COLOR_BGR2HSV).reshape(len(crops), -1, 3)
+
+    hue, sat, val = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    pixels = float(FEATURE_SIZE * FEATURE_SIZE)
+    colored = (sat > 80) & (val > 60)
+    hue_bin = (hue.astype(np.int32) * _HUE_BINS) // 180
+    hue_histogram = ((hue_bin[..., None] == np.arange(_HUE_BINS)) & colored[..., None]).sum(axis=1) / pixels
+    white = np.count_nonzero((sat < 40) & (val > 180), axis=1) / pixels
+    dark = np.count_nonzero(val < 50, axis=1) / pixels
+
+    return np.hstack([_hog(gray.astype(np.float32) / 255.0), hue_histogram,
+                      white[:, None], dark[:, None]]).astype(np.float32)
+
+
+def train_softmax(features, labels, n_classes, epochs=60, learning_rate=0.1, l2=1e-4,
+                  batch_size=256, seed=0):
+    """
+    Fit a multinomial logistic regression with mini-batch gradient descent
+    (momentum 0.9) on standardized features.
+
+    Args:
+        features: (n, d) feature matrix from extract_features()
+        labels: (n,) integer class indices
+        n_classes (int): Number of classes
+
+    Returns:
+        dict: weights, bias, mean, scale arrays for TrafficSignClassifier
+    """
+    rng = np.random.default_rng(seed)
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0) + 1e-6
+    x = (features - mean) / scale
+    n, d = x.shape
+
+    weights = np.zeros((d, n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    velocity_w, velocity_b = np.zeros_like(weights), np.zeros_like(bias)
+    onehot = np.eye(n_classes, dtype=np.float32)[labels]
+
+    for _ in range(epochs):
+        order = rng.permutation(n)
+        for start in range(0, n, batch_size):
+            batch = order[start:start + batch_size]
+            probabilities = _softmax(x[batch] @ weights + bias)
+            error = (probabilities - onehot[batch]) / len(batch)
+            velocity_w = 0.9 * velocity_w - learning_rate * (x[batch].T @ error + l2 * weights)
+            velocity_b = 0.9 * velocity_b - learning_rate * error.sum(axis=0)
+            weights += velocity_w
+            bias += velocity_b
+    return {'weights': weights, 'bias': bias, 'mean': mean.astype(np.float32), 'scale': scale.astype(np.float32)}
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class TrafficSignClassifier:
+    """
+    Multi-class traffic sign classifier for sign crops.
+
+    Loads a model saved by utils/train_classifier.py (.npz with the linear
+    weights, feature normalization and class names). classify_batch()
+    extracts features for all crops and scores them with one matrix
+    product, so classifying every proposal of a frame costs about as much
+    as resizing the crops. Without a model file it falls back to a basic
+    contour heuristic.
+    """
+
+    def __init__(self, model_path=None, min_confidence=0.5):
+        """
+        Initialize the classifier.
+
+        Args:
+            model_path (str): .npz model from utils/train_classifier.py (None = heuristic only)
+            min_confidence (float): Probability a prediction needs before callers accept it
+        """
+        self.model_path = model_path
+        self.min_confidence = min_confidence
+        self.model = None
+        self.classes = []
+        if model_path:
+            self.load(model_path)
+
+    @property
+    def ready(self):
+        """True when a trained model is loaded."""
+        return self.model is not None
+
+    def load(self, model_path):
+        """Load a trained model (keeps the heuristic fallback if the file is unusable)."""
+        try:
+            with np.load(model_path) as data:
+                self.model = {key: data[key] for key in ('weights', 'bias', 'mean', 'scale')}
+                self.classes = [str(name) for name in data['classes']]
+            self.model_path = model_path
+            print(f"✅ Sign classifier loaded: {os.path.basename(model_path)} ({len(self.classes)} classes)")
+        except Exception as e:
+            self.model = None
+            print(f"⚠️ Could not load sign classifier {model_path}: {e}")
+
+    def save(self, model_path, model, classes):
+        """Write a trained model (dict from train_softmax) and its class names."""
+        np.savez_compressed(model_path, classes=np.array(classes), **model)
+        self.model = model
+        self.classes = list(classes)
+        self.model_path = model_path
+
+    def probabilities(self, crops):
+        """(len(crops), n_classes) class probabilities (requires a loaded model)."""
+        model = self.model
+        x = (extract_features(crops) - model['mean']) / model['scale']
+        return _softmax(x @ model['weights'] + model['bias'])
+
+    def classify_batch(self, crops):
+        """
+        Classify many sign crops in one call.
+
+        Args:
+            crops: List of BGR images
+
+        Returns:
+            list: (sign_class, confidence) per crop; sign_class is a type key
+                  such as 'stop' or 'speed_limit_50', or 'background'
+        """
+        crops = list(crops)
+        if not crops:
+            return []
+        if self.model is None:
+            return [self._heuristic(crop) for crop in crops]
+
+        probabilities = self.probabilities(crops)
+        best = probabilities.argmax(axis=1)
+        return [(self.classes[index], float(probabilities[i, index])) for i, index in enumerate(best)]
+
+    def classify(self, sign_crop):
+        """
+        Classify a traffic sign image.
+
+        Args:
+            sign_crop: Cropped image of detected sign
+
+        Returns:
+            tuple: (sign_class, confidence)
+        """
+        return self.classify_batch([sign_crop])[0]
+
+    @staticmethod
+    def _heuristic(sign_crop):
+        """Untrained fallback: contour count as a rough complexity cue."""
+        gray = cv2.cvtColor(sign_crop, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(gray, 50, 150)
+        contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+        if len(contours) > 10:
+            return "Complex Sign", 0.6
+        return "Basic Sign", 0.5
@@ -5,7 +5,10 @@ Detects and classifies traffic signs from images or video frames
 
 import cv2
 import numpy as np
+import threading
 from pathlib import Path
+from detection_config import SignSettings
+from sign_classifier import TrafficSignClassifier  # Re-exported; formerly defined here
 
 try:
     from ultralytics import YOLO
@@ -33,6 +36,14 @@ class TrafficSignDetector:
         'parking', 'meter', 'road', 'street', 'signal'
     ]
     
+    # Detections below this confidence are never reported
+    MIN_KEEP_CONFIDENCE = 0.50
+    
+    # Frames whose luma thumbnail spans at least this range (5th-95th percentile)
+    # with a mean inside CONTRAST_MEAN_RANGE are considered well exposed
+    CONTRAST_MIN_SPREAD = 150
+    CONTRAST_MEAN_RANGE = (60, 190)
+    
     # Color codes for visualization
     SIGN_COLORS = {
         "Stop": (0, 0, 255),  # Red
@@ -43,7 +54,8 @@ class TrafficSignDetector:
         "Warning": (0, 255, 255),  # Yellow
     }
     
-    def __init__(self, model_name="yolov8s.pt", confidence=0.35, iou_threshold=0.45):
+    def __init__(self, model_name=None, confidence=None, iou_threshold=None, config=None,
+                 escalation_model=None, uncertain_band=None):
         """
         Initialize the traffic sign detector with improved accuracy settings.
         
@@ -51,23 +63,85 @@ class TrafficSignDetector:
             model_name (str): YOLOv8 model name (nano, small, medium, large, xlarge)
             confidence (float): Confidence threshold for detections (0-1). Lower = more detections
             iou_threshold (float): NMS IoU threshold to avoid duplicate detections
+            config: Optional ConfigManager; [TRAFFIC_SIGNS] values are used (and
+                    hot-reloaded) for every setting not passed explicitly
+            escalation_model (str): Larger model for the confidence-gated cascade; when set,
+                                    `model_name` should be a small model (e.g. yolov8n.pt)
+            uncertain_band (tuple): (low, high) confidences that are re-checked with the
+                                    escalation model; boxes at or above high are kept as is
         """
+        self.config = config
+        self._pinned = {
+            'model': model_name is not None,
+            'confidence': confidence is not None,
+            'iou_threshold': iou_threshold is not None,
+            'escalation': escalation_model is not None or uncertain_band is not None
+        }
+        settings = config.current().signs if config is not None else SignSettings()
+        
         self.model = None
-        self.confidence = confidence
-        self.iou_threshold = iou_threshold
-        self.model_name = model_name
+        self.confidence = confidence if confidence is not None else settings.confidence
+        self.iou_threshold = iou_threshold if iou_threshold is not None else settings.iou_threshold
+        self.model_name = model_name or settings.model
+        self.preprocess = settings.preprocessing
+        self.escalation_model_name = escalation_model or settings.escalation_model
+        self.uncertain_band = tuple(uncertain_band or settings.uncertain_band)
+        self.escalations = 0
+        self._escalation_model = None
+        self._escalation_loaded = False
+        self._model_lock = threading.Lock()
+        self._local = threading.local()
+        self._class_tables = {}
         
         if not YOLO_AVAILABLE:
             print("⚠️ YOLOv8 not installed. Install with: pip install ultralytics")
             return
         
+        self.model = self._load_model(self.model_name)
+    
+    def _load_model(self, model_name):
+        """Load a YOLO model, returning None on failure."""
         try:
-            self.model = YOLO(model_name)
+            model = YOLO(model_name)
             print(f"✅ Traffic Sign Detector loaded: {model_name}")
-            print(f"   Confidence threshold: {confidence}")
-            print(f"   NMS IoU threshold: {iou_threshold}")
+            print(f"   Confidence threshold: {self.confidence}")
+            print(f"   NMS IoU threshold: {self.iou_threshold}")
+            return model
         except Exception as e:
             print(f"❌ Error loading YOLO model: {e}")
+            return None
+    
+    def _refresh_settings(self):
+        """
+        Pick up hot-reloaded [TRAFFIC_SIGNS] settings.
+        A changed model is loaded before being swapped in, so requests
+        already running keep using the previous model object.
+        """
+        if self.config is None:
+            return
+        settings = self.config.current().signs
+        if not self._pinned['confidence']:
+            self.confidence = settings.confidence
+        if not self._pinned['iou_threshold']:
+            self.iou_threshold = settings.iou_threshold
+        self.preprocess = settings.preprocessing
+        if not self._pinned['escalation']:
+            self.uncertain_band = settings.uncertain_band
+            if settings.escalation_model != self.escalation_model_name:
+                # Loaded lazily on the next uncertain detection
+                with self._model_lock:
+                    self.escalation_model_name = settings.escalation_model
+                    self._escalation_model = None
+                    self._escalation_loaded = False
+        
+        if self._pinned['model'] or not YOLO_AVAILABLE or settings.model == self.model_name:
+            return
+        with self._model_lock:
+            if settings.model != self.model_name:
+                model = self._load_model(settings.model)
+                if model is not None:
+                    self.model = model
+                self.model_name = settings.model
     
     def _is_traffic_object(self, class_id, class_name):
         """
@@ -93,141 +167,339 @@ class TrafficSignDetector:
         
         return False  # Reject everything else
     
-    def detect(self, frame, preprocess=True):
+    def detect(self, frame, preprocess=None, roi=None, annotate=True):
         """
         Detect traffic signs in an image frame with improved accuracy.
         
         Args:
             frame: Input image (numpy array)
             preprocess (bool): Apply image preprocessing for better detection
+                               (default: ENABLE_PREPROCESSING from config, else True)
+            roi: Optional CameraROI; the model only sees its crop and detections
+                 centered outside the polygons are dropped
+            annotate (bool): Draw the detections on a copy of the frame; callers that
+                             draw themselves (or only need boxes) can skip it
         
         Returns:
             dict: Containing:
                 - 'detections': List of detected signs with bounding boxes
                 - 'signs': List of detected sign types
-                - 'annotated_frame': Image with bounding boxes drawn
+                - 'annotated_frame': Image with bounding boxes drawn (None if not annotated)
                 - 'status': Detection status message
         """
-        if self.model is None:
-            return {
-                'detections': [],
-                'signs': [],
-                'annotated_frame': frame,
-                'status': 'Model not loaded'
-            }
+        return self.detect_batch([frame], preprocess=preprocess, rois=[roi], annotate=annotate)[0]
+    
+    def _empty_result(self, frame, status):
+        return {
+            'detections': [],
+            'signs': [],
+            'annotated_frame': frame,
+            'status': status
+        }
+    
+    def _parse_boxes(self, result, frame_size, roi=None, offset=(0, 0), min_confidence=None, model_name=None):
+        """
+        Kept detections of one YOLO result, in frame coordinates, tagged with the model name.
+        Boxes, confidences and classes are pulled out as whole arrays and the
+        confidence, class and ROI filters applied as masks, so per-box work is
+        limited to building the dicts of the kept boxes.
+        """
+        if min_confidence is None:
+            min_confidence = self.MIN_KEEP_CONFIDENCE
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        dx, dy = offset
         
-        try:
-            # Preprocess image for better detection
-            inference_frame = frame.copy()
-            if preprocess:
-                inference_frame = self._preprocess_image(inference_frame)
-            
-            # Run inference with NMS
-            results = self.model(inference_frame, conf=self.confidence, iou=self.iou_threshold, verbose=False)
-            
-            detections = []
-            signs_found = []
-            annotated_frame = frame.copy()
-            
-            # Process results
-            if results and len(results) > 0:
-                result = results[0]
-                boxes = result.boxes
-                
-                for box in boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    
-                    # HIGH ACCURACY CHECK: Skip low confidence detections
-                    if conf < 0.50:
-                        continue
-                    
-                    # Get class name
-                    sign_name = result.names.get(cls, f"Sign {cls}")
-                    
-                    # STRICT FILTER: Only STOP signs - reject all others
-                    if not self._is_traffic_object(cls, sign_name):
-                        continue
-                    
-                    # Store detection info
-                    detection_info = {
-                        'sign': sign_name,
-                        'confidence': conf,
-                        'bbox': (x1, y1, x2, y2),
-                        'class': cls
-                    }
-                    
-                    detections.append(detection_info)
-                    signs_found.append(sign_name)
-                    
-                    # Draw bounding box
-                    color = self._get_color_for_sign(sign_name)
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 3)
-                    
-                    # Draw label with better positioning to avoid overlap
-                    label = f"{sign_name} ({conf:.0%})"
-                    font = cv2.FONT_HERSHEY_SIMPLEX
-                    font_scale = 0.6
-                    thickness = 2
-                    
-                    # Get text size for background
-                    text_size = cv2.getTextSize(label, font, font_scale, thickness)[0]
-                    text_x = x1
-                    text_y = y1 - 8
-                    
-                    # Adjust text position if too close to edge
-                    if text_y - text_size[1] < 0:
-                        text_y = y2 + text_size[1] + 8
-                    
-                    # Draw text background
-                    cv2.rectangle(annotated_frame, 
-                                 (text_x - 2, text_y - text_size[1] - 2),
-                                 (text_x + text_size[0] + 2, text_y + 2),
-                                 color, -1)
-                    
-                    # Draw text
-                    cv2.putText(annotated_frame, label, (text_x, text_y),
-                               font, font_scale, (255, 255, 255), thickness)
-                
-                status = f"✅ Detected {len(signs_found)} sign(s)"
-            else:
-                status = "⚠️ No traffic signs detected"
-            
-            return {
-                'detections': detections,
-                'signs': signs_found,
-                'annotated_frame': annotated_frame,
-                'status': status
+        xyxy = self._to_numpy(boxes.xyxy).astype(np.int64) + np.array([dx, dy, dx, dy])
+        confidences = self._to_numpy(boxes.conf).reshape(-1)
+        classes = self._to_numpy(boxes.cls).reshape(-1).astype(np.int64)
+        
+        # HIGH ACCURACY CHECK: Skip low confidence detections
+        # STRICT FILTER: Only STOP signs - reject all others
+        keep = (confidences >= min_confidence) & self._class_mask(result.names, classes)
+        
+        # Lane-region filter: the sign's center must lie inside the ROI polygons
+        if roi is not None and keep.any():
+            keep &= roi.contains_points((xyxy[:, 0] + xyxy[:, 2]) // 2, (xyxy[:, 1] + xyxy[:, 3]) // 2, frame_size)
+        
+        names = result.names
+        model_name = model_name or self.model_name
+        return [
+            {
+                'sign': names.get(cls, f"Sign {cls}"),
+                'confidence': conf,
+                'bbox': tuple(box),
+                'class': cls,
+                'model': model_name
             }
+            for box, conf, cls in zip(xyxy[keep].tolist(), confidences[keep].tolist(), classes[keep].tolist())
+        ]
+    
+    @staticmethod
+    def _to_numpy(values):
+        """NumPy array from a result tensor (torch on any device) or array-like."""
+        if hasattr(values, 'cpu'):
+            values = values.cpu().numpy()
+        return np.asarray(values)
+    
+    def _class_mask(self, names, classes):
+        """Boolean mask of class ids accepted by _is_traffic_object (lookup table cached per names dict)."""
+        cached = self._class_tables.get(id(names))
+        if cached is None or cached[0] is not names:
+            size = max(list(names) + [13]) + 1
+            table = np.array([self._is_traffic_object(i, names.get(i, f"Sign {i}")) for i in range(size)])
+            cached = (names, table)
+            self._class_tables[id(names)] = cached
+        table = cached[1]
+        return (classes < len(table)) & table[np.clip(classes, 0, len(table) - 1)]
+    
+    def _build_result(self, frame, detections, enhanced, annotate=True):
+        """detect()-style result dict, optionally with the detections drawn on a copy of the frame."""
+        signs_found = [detection['sign'] for detection in detections]
+        return {
+            'detections': detections,
+            'signs': signs_found,
+            'annotated_frame': self.annotate(frame, detections) if annotate else None,
+            'status': f"✅ Detected {len(signs_found)} sign(s)",
+            'enhanced': enhanced
+        }
+    
+    def annotate(self, frame, detections):
+        """
+        Drawing stage, separate from detection: a copy of the frame with
+        each detection's box and label.
+        
+        Args:
+            frame: Image the detections belong to
+            detections: 'detections' list of a detect() result
+        
+        Returns:
+            numpy.ndarray: Annotated copy of the frame
+        """
+        annotated_frame = frame.copy()
+        for detection in detections:
+            self._draw_detection(annotated_frame, detection)
+        return annotated_frame
+    
+    def _draw_detection(self, annotated_frame, detection):
+        """Draw one detection's box and label."""
+        x1, y1, x2, y2 = detection['bbox']
+        sign_name = detection['sign']
+        conf = detection['confidence']
+        
+        # Draw bounding box
+        color = self._get_color_for_sign(sign_name)
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 3)
+        
+        # Draw label with better positioning to avoid overlap
+        label = f"{sign_name} ({conf:.0%})"
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        font_scale = 0.6
+        thickness = 2
+        
+        # Get text size for background
+        text_size = cv2.getTextSize(label, font, font_scale, thickness)[0]
+        text_x = x1
+        text_y = y1 - 8
+        
+        # Adjust text position if too close to edge
+        if text_y - text_size[1] < 0:
+            text_y = y2 + text_size[1] + 8
+        
+        # Draw text background
+        cv2.rectangle(annotated_frame, 
+                     (text_x - 2, text_y - text_size[1] - 2),
+                     (text_x + text_size[0] + 2, text_y + 2),
+                     color, -1)
+        
+        # Draw text
+        cv2.putText(annotated_frame, label, (text_x, text_y),
+                   font, font_scale, (255, 255, 255), thickness)
+    
+    def detect_regions(self, frames, regions, expand=1.6, imgsz=160, preprocess=None, rois=None, annotate=True):
+        """
+        Run the model only on candidate regions (stage 2 of the sign cascade).
+        Each region is grown by `expand` into a square crop for context; the
+        crops of all frames go through one batched model call at `imgsz`
+        input size, and boxes are mapped back to frame coordinates with
+        duplicates from overlapping crops suppressed.
+        
+        Args:
+            frames: List of images
+            regions: Per frame, a list of (x, y, w, h) proposals
+            expand (float): Crop side as a multiple of the proposal's longer side
+            imgsz (int): Model input size for the crops (multiple of 32, e.g. 96-160)
+            preprocess (bool): Same as detect()
+            rois: Optional list with a CameraROI (or None) per frame, for the center filter
+            annotate (bool): Same as detect()
+        
+        Returns:
+            list: detect()-style result per frame, with 'crops' (number of crops run)
+        """
+        self._refresh_settings()
+        model = self.model
+        if model is None:
+            return [self._empty_result(frame, 'Model not loaded') for frame in frames]
+        if preprocess is None:
+            preprocess = self.preprocess
+        rois = rois or [None] * len(frames)
         
+        crops, owners = [], []
+        enhanced = [False] * len(frames)
+        for index, (frame, boxes) in enumerate(zip(frames, regions)):
+            height, width = frame.shape[:2]
+            for x, y, w, h in boxes:
+                side = int(max(w, h) * expand)
+                cx, cy = x + w // 2, y + h // 2
+                x0, y0 = max(0, cx - side // 2), max(0, cy - side // 2)
+                x1, y1 = min(width, x0 + side), min(height, y0 + side)
+                crop = frame[y0:y1, x0:x1]
+                if bool(preprocess) and self._needs_enhancement(crop):
+                    crop = self._preprocess_image(crop)
+                    enhanced[index] = True
+                crops.append(crop)
+                owners.append((index, (x0, y0)))
+        
+        found = [[] for _ in frames]
+        try:
+            if crops:
+                results = model(crops, imgsz=imgsz, conf=self._first_pass_confidence(),
+                                iou=self.iou_threshold, verbose=False)
+                for result, (index, offset) in zip(results, owners):
+                    frame = frames[index]
+                    found[index].extend(self._parse_boxes(result, (frame.shape[1], frame.shape[0]),
+                                                          rois[index], offset, self._first_pass_floor()))
+                found = self._escalate(frames, found, rois)
         except Exception as e:
-            return {
-                'detections': [],
-                'signs': [],
-                'annotated_frame': frame,
-                'status': f'❌ Error: {str(e)}'
-            }
+            return [self._empty_result(frame, f'❌ Error: {str(e)}') for frame in frames]
+        
+        outputs = []
+        for index, frame in enumerate(frames):
+            detections = self._merge_overlaps(found[index])
+            output = self._build_result(frame, detections, enhanced[index], annotate)
+            output['crops'] = sum(1 for owner, _ in owners if owner == index)
+            outputs.append(output)
+        return outputs
+    
+    def _first_pass_confidence(self):
+        """Model threshold for the first pass; the cascade needs the uncertain band too."""
+        if self.escalation_model_name:
+            return min(self.confidence, self.uncertain_band[0])
+        return self.confidence
+    
+    def _first_pass_floor(self):
+        """Lowest first-pass confidence kept for reporting or escalation."""
+        if self.escalation_model_name:
+            return min(self.MIN_KEEP_CONFIDENCE, self.uncertain_band[0])
+        return self.MIN_KEEP_CONFIDENCE
+    
+    def _escalation(self):
+        """Escalation model, loaded on first use (None if unset or failed to load)."""
+        if not self._escalation_loaded:
+            with self._model_lock:
+                if not self._escalation_loaded:
+                    if self.escalation_model_name and YOLO_AVAILABLE:
+                        self._escalation_model = self._load_model(self.escalation_model_name)
+                    self._escalation_loaded = True
+        return self._escalation_model
+    
+    def _escalate(self, frames, found, rois, expand=1.5, min_side=64):
+        """
+        Confidence-gated cascade: first-pass boxes at or above the band's upper
+        edge are kept; boxes inside the band are re-checked on a context crop
+        with the escalation model (all crops in one batched call), whose
+        boxes replace them. Without an escalation model the normal
+        MIN_KEEP_CONFIDENCE rule applies.
+        
+        Args:
+            frames: Images the detections belong to
+            found: Per frame, first-pass detections (frame coordinates)
+            rois: Per frame, CameraROI or None
+        
+        Returns:
+            list: Per frame, final detections
+        """
+        if not self.escalation_model_name:
+            return found
+        low, high = self.uncertain_band
+        
+        final, crops, owners = [], [], []
+        for index, (frame, detections) in enumerate(zip(frames, found)):
+            final.append([d for d in detections if d['confidence'] >= high])
+            height, width = frame.shape[:2]
+            for detection in detections:
+                if not low <= detection['confidence'] < high:
+                    continue
+                x1, y1, x2, y2 = detection['bbox']
+                side = max(min_side, int(max(x2 - x1, y2 - y1) * expand))
+                cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+                x0, y0 = max(0, cx - side // 2), max(0, cy - side // 2)
+                crops.append(frame[y0:min(height, y0 + side), x0:min(width, x0 + side)])
+                owners.append((index, (x0, y0)))
+        if not crops:
+            return final
+        
+        model = self._escalation()
+        if model is None:
+            return [[d for d in detections if d['confidence'] >= self.MIN_KEEP_CONFIDENCE]
+                    for detections in found]
+        
+        results = model(crops, conf=self.confidence, iou=self.iou_threshold, verbose=False)
+        self.escalations += len(crops)
+        for result, (index, offset) in zip(results, owners):
+            frame = frames[index]
+            final[index].extend(self._parse_boxes(result, (frame.shape[1], frame.shape[0]), rois[index],
+                                                  offset, model_name=self.escalation_model_name))
+        return [self._merge_overlaps(detections) for detections in final]
     
+    def _merge_overlaps(self, detections):
+        """Drop duplicates of the same sign found in overlapping crops (NMS at iou_threshold)."""
+        if len(detections) < 2:
+            return detections
+        boxes = [[x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in (d['bbox'] for d in detections)]
+        scores = [d['confidence'] for d in detections]
+        keep = cv2.dnn.NMSBoxes(boxes, scores, 0.0, self.iou_threshold)
+        return [detections[i] for i in sorted(int(k) for k in np.array(keep).flatten())]
+    
+    def _needs_enhancement(self, frame):
+        """
+        Contrast check on a 64x48 luma thumbnail.
+        Well-exposed frames (wide luma spread, mid-range mean) skip CLAHE.
+        """
+        thumb = cv2.cvtColor(cv2.resize(frame, (64, 48), interpolation=cv2.INTER_AREA),
+                             cv2.COLOR_BGR2GRAY)
+        low, high = np.percentile(thumb, (5, 95))
+        mean = float(thumb.mean())
+        well_exposed = (high - low) >= self.CONTRAST_MIN_SPREAD and \
+                       self.CONTRAST_MEAN_RANGE[0] <= mean <= self.CONTRAST_MEAN_RANGE[1]
+        return not well_exposed
+    
+    def _clahe(self):
+        """CLAHE instance cached per thread (cv2 CLAHE objects keep internal buffers)."""
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._local.clahe = clahe
+        return clahe
     
     def _preprocess_image(self, frame):
         """
         Preprocess image for better sign detection.
         Handles varying lighting and contrast conditions.
+        CLAHE runs on luma only; the luma change is added back to all three
+        channels, which shifts brightness without touching chroma and avoids
+        the BGR<->LAB round trip.
         """
         try:
-            # Enhance contrast (CLAHE - Contrast Limited Adaptive Histogram Equalization)
-            lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            l = clahe.apply(l)
-            
-            enhanced = cv2.merge([l, a, b])
-            enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+            luma = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            equalized = self._clahe().apply(luma)
             
-            return enhanced
-        except:
+            # Saturating uint8 arithmetic: add the brightening part, subtract the darkening part
+            brighter = cv2.cvtColor(cv2.subtract(equalized, luma), cv2.COLOR_GRAY2BGR)
+            darker = cv2.cvtColor(cv2.subtract(luma, equalized), cv2.COLOR_GRAY2BGR)
+            return cv2.subtract(cv2.add(frame, brighter), darker)
+        except cv2.error:
             return frame
     
     def _get_color_for_sign(self, sign_name):
@@ -249,17 +521,68 @@ class TrafficSignDetector:
         else:
             return (255, 0, 0)  # Blue
     
-    def detect_batch(self, frames):
+    def detect_batch(self, frames, preprocess=None, rois=None, annotate=True):
         """
-        Detect signs in multiple frames.
+        Detect signs in multiple frames with a single batched model call.
+        Frames may have different sizes; each result matches detect().
         
         Args:
             frames: List of image frames
+            preprocess (bool): Same as detect()
+            rois: Optional list with a CameraROI (or None) per frame
+            annotate (bool): Same as detect()
         
         Returns:
             list: List of detection results
         """
-        return [self.detect(frame) for frame in frames]
+        self._refresh_settings()
+        model = self.model
+        if model is None:
+            return [self._empty_result(frame, 'Model not loaded') for frame in frames]
+        if not frames:
+            return []
+        
+        if preprocess is None:
+            preprocess = self.preprocess
+        
+        rois = rois or [None] * len(frames)
+        
+        try:
+            # Only the ROI crops go through preprocessing and the model
+            crops, offsets = [], []
+            for frame, roi in zip(frames, rois):
+                crop, _, offset = roi.crop(frame) if roi is not None else (frame, None, (0, 0))
+                crops.append(crop)
+                offsets.append(offset)
+            
+            # Preprocess images for better detection (skipped for well-exposed frames)
+            enhanced = [bool(preprocess) and self._needs_enhancement(crop) for crop in crops]
+            inference_frames = [self._preprocess_image(crop) if flag else crop
+                                for crop, flag in zip(crops, enhanced)]
+            
+            # Run inference with NMS on the whole batch
+            results = model(inference_frames, conf=self._first_pass_confidence(),
+                            iou=self.iou_threshold, verbose=False)
+            
+            found = []
+            for index, frame in enumerate(frames):
+                if results is not None and index < len(results):
+                    found.append(self._parse_boxes(results[index], (frame.shape[1], frame.shape[0]),
+                                                   rois[index], offsets[index], self._first_pass_floor()))
+                else:
+                    found.append([])
+            found = self._escalate(frames, found, rois)
+            
+            outputs = []
+            for index, frame in enumerate(frames):
+                output = self._build_result(frame, found[index], enhanced[index], annotate)
+                if not found[index] and (results is None or index >= len(results)):
+                    output['status'] = "⚠️ No traffic signs detected"
+                outputs.append(output)
+            return outputs
+        
+        except Exception as e:
+            return [self._empty_result(frame, f'❌ Error: {str(e)}') for frame in frames]
     
     def get_debug_info(self, frame):
         """
@@ -286,44 +609,6 @@ class TrafficSignDetector:
         }
 
 
-# Alternative: Simpler sign classification using pre-trained CNN
-class TrafficSignClassifier:
-    """
-    Lightweight traffic sign classifier using pre-trained model.
-    Falls back to basic shape/color detection if model unavailable.
-    """
-    
-    def __init__(self):
-        """Initialize the classifier."""
-        self.model = None
-        
-    def classify(self, sign_crop):
-        """
-        Classify a traffic sign image.
-        
-        Args:
-            sign_crop: Cropped image of detected sign
-        
-        Returns:
-            tuple: (sign_class, confidence)
-        """
-        # Placeholder for classification logic
-        # In production, would use a trained CNN model
-        
-        # Analyze shape and color
-        gray = cv2.cvtColor(sign_crop, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-        contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Count contours to estimate sign type
-        num_contours = len(contours)
-        
-        if num_contours > 10:
-            return "Complex Sign", 0.6
-        else:
-            return "Basic Sign", 0.5
-
-
 if __name__ == "__main__":
     # Test the detector
     detector = TrafficSignDetector()
@@ -4,6 +4,9 @@
 import cv2
 import numpy as np
 from skimage import measure
+from detection_config import LightThresholds
+from fused_kernel import count_light_pixels
+from sign_classifier import BACKGROUND, TrafficSignClassifier, display_name
 
 class TrafficDetector:
     """Detects traffic signals and signs using HSV and shape analysis."""
@@ -20,6 +23,9 @@ class TrafficDetector:
     GREEN_LOWER = np.array([45, 100, 80])
     GREEN_UPPER = np.array([90, 255, 255])
     
+    # Minimum pixels required to report a light color
+    MIN_PIXELS = 50
+    
     # ========== TRAFFIC SIGNS (HSV Ranges) ==========
     # Red signs (Stop, Yield)
     SIGN_RED_LOWER1 = np.array([0, 80, 100])
@@ -35,7 +41,46 @@ class TrafficDetector:
     KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
     KERNEL_SIGN = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
     
-    def __init__(self):
+    def __init__(self, config=None, pyramid_levels=0, refine=False, fused_counts=False, classifier=None,
+                 approximate=False, sample_step=4, confidence_z=3.0):
+        """
+        Args:
+            config: Optional ConfigManager; light thresholds then come from
+                    config.ini (hot-reloaded) instead of the class constants
+            pyramid_levels (int): Compute masks and morphology on a frame reduced
+                                  by 2**levels (0 = full resolution)
+            refine (bool): With pyramid_levels > 0, re-run sign shape analysis at
+                           full resolution on the candidate regions only
+            fused_counts (bool): Count light pixels in one pass over the BGR frame
+                                 (fused_kernel, Numba when installed) instead of
+                                 HSV masks + morphological opening
+            classifier: TrafficSignClassifier or .npz model path used to label HSV
+                        sign proposals (default: [TRAFFIC_SIGNS] CLASSIFIER_MODEL)
+            approximate (bool): detect_light() classifies a reduced sample of the
+                                frame (see estimate_light) and only runs the exact
+                                path when the sample cannot decide
+            sample_step (int): Reduce by N in both directions (N*N fewer pixels)
+            confidence_z (float): Standard errors the sampled margins must exceed
+        """
+        self.config = config
+        self.pyramid_levels = pyramid_levels
+        self.refine = refine
+        self.fused_counts = fused_counts
+        self.approximate = approximate
+        self.sample_step = sample_step
+        self.confidence_z = confidence_z
+        self._kernels = {}
+        if isinstance(classifier, str):
+            classifier = TrafficSignClassifier(classifier)
+        self._classifier = classifier
+        self._classifier_pinned = classifier is not None
+        self._classifier_path = None
+        self._default_thresholds = LightThresholds({
+            'red': [(self.RED_LOWER1, self.RED_UPPER1), (self.RED_LOWER2, self.RED_UPPER2)],
+            'yellow': [(self.YELLOW_LOWER, self.YELLOW_UPPER)],
+            'green': [(self.GREEN_LOWER, self.GREEN_UPPER)],
+        }, self.MIN_PIXELS)
+        
         self.signal_names = {
             'red': 'RED LIGHT',
             'yellow': 'YELLOW LIGHT',
@@ -64,95 +109,515 @@ class TrafficDetector:
             'none': (255, 255, 255)
         }
     
-    def detect_light(self, frame):
-        """Detect traffic light color."""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    def thresholds(self):
+        """Current light thresholds snapshot (config.ini if configured, else class constants)."""
+        if self.config is not None:
+            return self.config.current().lights
+        return self._default_thresholds
+    
+    def _kernel(self, size, scale):
+        """Elliptical kernel of `size` full-resolution pixels at a 1/scale reduced frame."""
+        key = (size, scale)
+        if key not in self._kernels:
+            reduced = max(3, int(round(size / scale)) | 1)
+            self._kernels[key] = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (reduced, reduced))
+        return self._kernels[key]
+    
+    @staticmethod
+    def _pyramid_down(frame, levels):
+        for _ in range(levels):
+            frame = cv2.pyrDown(frame)
+        return frame
+    
+    def detect_light(self, frame, roi=None):
+        """
+        Detect traffic light color.
         
-        red_mask = cv2.inRange(hsv, self.RED_LOWER1, self.RED_UPPER1) + \
-                   cv2.inRange(hsv, self.RED_LOWER2, self.RED_UPPER2)
-        yellow_mask = cv2.inRange(hsv, self.YELLOW_LOWER, self.YELLOW_UPPER)
-        green_mask = cv2.inRange(hsv, self.GREEN_LOWER, self.GREEN_UPPER)
-        
-        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, self.KERNEL)
-        yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_OPEN, self.KERNEL)
-        green_mask = cv2.morphologyEx(green_mask, cv2.MORPH_OPEN, self.KERNEL)
-        
-        red_pixels = cv2.countNonZero(red_mask)
-        yellow_pixels = cv2.countNonZero(yellow_mask)
-        green_pixels = cv2.countNonZero(green_mask)
-        
-        if red_pixels > 50 and red_pixels > yellow_pixels and red_pixels > green_pixels:
-            signal_key = 'red'
-        elif yellow_pixels > 50 and yellow_pixels > red_pixels and yellow_pixels > green_pixels:
-            signal_key = 'yellow'
-        elif green_pixels > 50 and green_pixels > red_pixels and green_pixels > yellow_pixels:
-            signal_key = 'green'
+        Args:
+            frame: Input image
+            roi: Optional CameraROI; only pixels inside it are counted
+        """
+        if self.approximate:
+            signal_key = self.estimate_light(frame, roi)['signal']
         else:
-            signal_key = 'none'
-        
+            signal_key = self._exact_light(frame, roi)
         return signal_key, self.signal_names[signal_key], self.signal_colors[signal_key]
     
-    def _circularity(self, contour):
-        """Calculate circularity of a contour (0-1, where 1 is perfect circle)."""
-        area = cv2.contourArea(contour)
-        perimeter = cv2.arcLength(contour, True)
-        if perimeter == 0:
-            return 0
-        circularity = 4 * np.pi * area / (perimeter * perimeter)
-        return circularity
-    
-    def _shape_ratio(self, contour):
-        """Get width/height ratio of contour bounding box."""
-        x, y, w, h = cv2.boundingRect(contour)
-        if h == 0:
-            return 0
-        return w / h
-    
-    def _count_corners(self, contour):
-        """Approximate contour and count corners."""
-        epsilon = 0.02 * cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, epsilon, True)
-        return len(approx)
-    
-    def detect_signs(self, frame):
-        """Detect traffic signs (Stop, Yield, Speed Limit)."""
+    def _exact_light(self, frame, roi=None):
+        """Light verdict from every pixel (HSV masks + opening, or fused counts)."""
+        thresholds = self.thresholds()
+        min_pixels = thresholds.min_pixels
+        kernel = self.KERNEL
+        
+        region_mask = None
+        if roi is not None:
+            frame, region_mask, _ = roi.crop(frame)
+        
+        # Multi-resolution mode: pixel counts shrink with the area (4x per level)
+        if self.pyramid_levels:
+            scale = 2 ** self.pyramid_levels
+            frame = self._pyramid_down(frame, self.pyramid_levels)
+            min_pixels = min_pixels / (scale * scale)
+            kernel = self._kernel(5, scale)
+            if region_mask is not None:
+                region_mask = roi.mask_for(region_mask, frame.shape)
+        
+        if self.fused_counts:
+            counts = count_light_pixels(frame, thresholds, mask=region_mask)['counts']
+            red_pixels, yellow_pixels, green_pixels = counts['red'], counts['yellow'], counts['green']
+        else:
+            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+            
+            red_mask = thresholds.mask(hsv, 'red')
+            yellow_mask = thresholds.mask(hsv, 'yellow')
+            green_mask = thresholds.mask(hsv, 'green')
+            
+            if region_mask is not None:
+                red_mask &= region_mask
+                yellow_mask &= region_mask
+                green_mask &= region_mask
+            
+            red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, kernel)
+            yellow_mask = cv2.morphologyEx(yellow_mask, cv2.MORPH_OPEN, kernel)
+            green_mask = cv2.morphologyEx(green_mask, cv2.MORPH_OPEN, kernel)
+            
+            red_pixels = cv2.countNonZero(red_mask)
+            yellow_pixels = cv2.countNonZero(yellow_mask)
+            green_pixels = cv2.countNonZero(green_mask)
+        
+        return self.classify_counts(red_pixels, yellow_pixels, green_pixels, min_pixels)
+    
+    def estimate_light(self, frame, roi=None, step=None):
+        """
+        Approximate light verdict from about 1/step**2 of the pixels,
+        counting the same quantity as the exact path:
+        
+        - fused_counts: every `step`-th pixel in both directions, unopened
+          like the fused exact counts. Each sampled pixel is a draw from the
+          frame's color proportions, so the counts carry a binomial error.
+        - otherwise: an INTER_AREA thumbnail reduced `step` times, with HSV
+          masks opened by the 5-pixel kernel scaled to the thumbnail, so
+          speckle the exact opening removes is removed here too. The
+          thumbnail counts are checked against the same binomial bound,
+          which grows like the lamp perimeter its resampling blurs.
+        
+        The verdict is trusted when both deciding margins (winner above
+        MIN_PIXELS, scaled to the sample, and winner above the runner-up)
+        exceed `confidence_z` standard errors; otherwise the exact path
+        decides.
+        
+        Args:
+            frame: Input image
+            roi: Optional CameraROI
+            step (int): Reduction factor per direction (default: sample_step)
+        
+        Returns:
+            dict: 'signal', 'exact' (True if the exact path decided), 'counts'
+                  (estimated full-resolution pixels per color), 'margin' and
+                  'bound' (smallest deciding margin and its error bound, in
+                  full-resolution pixels), 'sampled' (pixels sampled)
+        """
+        thresholds = self.thresholds()
+        step = step or self.sample_step
+        
+        sample, region_mask = frame, None
+        if roi is not None:
+            sample, region_mask, _ = roi.crop(frame)
+        height, width = sample.shape[:2]
+        
+        if self.fused_counts:
+            start = step // 2
+            sample = np.ascontiguousarray(sample[start::step, start::step])
+            if region_mask is not None:
+                region_mask = np.ascontiguousarray(region_mask[start::step, start::step])
+            counts = count_light_pixels(sample, thresholds, mask=region_mask)['counts']
+        else:
+            size = (max(1, width // step), max(1, height // step))
+            sample = cv2.resize(sample, size, interpolation=cv2.INTER_AREA)
+            if region_mask is not None:
+                region_mask = roi.mask_for(region_mask, sample.shape)
+            hsv = cv2.cvtColor(sample, cv2.COLOR_BGR2HSV)
+            kernel = self._kernel(5, step)
+            counts = {}
+            for color in ('red', 'yellow', 'green'):
+                mask = thresholds.mask(hsv, color)
+                if region_mask is not None:
+                    mask &= region_mask
+                counts[color] = cv2.countNonZero(cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel))
+        
+        sampled = cv2.countNonZero(region_mask) if region_mask is not None else sample.shape[0] * sample.shape[1]
+        area = (height * width) / float(sample.shape[0] * sample.shape[1])
+        min_count = thresholds.min_pixels / area
+        signal_key = self.classify_counts(counts['red'], counts['yellow'], counts['green'], min_count)
+        
+        # Binomial standard errors of the sampled counts (proportions smoothed so
+        # that zero counts still get a non-zero error)
+        first, second = sorted(counts.values(), reverse=True)[:2]
+        n = max(sampled, 1)
+        p1, p2 = (first + 0.5) / (n + 1), (second + 0.5) / (n + 1)
+        margins = [(abs(first - min_count), self.confidence_z * np.sqrt(n * p1 * (1 - p1)))]
+        if first > min_count:
+            margins.append((first - second, self.confidence_z * np.sqrt(n * (p1 + p2 - (p1 - p2) ** 2))))
+        margin, bound = min(margins, key=lambda m: m[0] - m[1])
+        
+        exact = bool(margin <= bound)
+        if exact:
+            signal_key = self._exact_light(frame, roi)
+        
+        return {
+            'signal': signal_key,
+            'exact': exact,
+            'counts': {color: count * area for color, count in counts.items()},
+            'margin': float(margin * area),
+            'bound': float(bound * area),
+            'sampled': sampled
+        }
+    
+    @staticmethod
+    def classify_counts(red_pixels, yellow_pixels, green_pixels, min_pixels):
+        """Light verdict from per-color pixel counts: the dominant color above min_pixels."""
+        if red_pixels > min_pixels and red_pixels > yellow_pixels and red_pixels > green_pixels:
+            return 'red'
+        elif yellow_pixels > min_pixels and yellow_pixels > red_pixels and yellow_pixels > green_pixels:
+            return 'yellow'
+        elif green_pixels > min_pixels and green_pixels > red_pixels and green_pixels > yellow_pixels:
+            return 'green'
+        return 'none'
+    
+    def locate_lights(self, frame, lamp_sizes=None, min_confidence=0.4, nms_threshold=0.3, roi=None):
+        """
+        Localize individual traffic lights with a vertical 3-lamp template.
+        Per-color integral images are built once per frame, so every window
+        (red cell over yellow cell over green cell) is scored in O(1) at
+        every scale.
+        
+        Args:
+            frame: Input image
+            lamp_sizes: Lamp cell sizes in pixels (default: geometric range derived from frame size)
+            min_confidence (float): Minimum window score to report
+            nms_threshold (float): Overlap (intersection over the smaller lamp) above which
+                                   the weaker window is suppressed
+            roi: Optional CameraROI; only its crop is searched and lamp pixels
+                 outside the polygons are ignored
+        
+        Returns:
+            list: dicts with 'type', 'name', 'box' (x, y, w, h of the housing),
+                  'lamp_box' (the lit cell), 'color', 'confidence'
+        """
+        # Lamp sizes follow the full frame, so a crop sees the same scales
+        base_size = max(8, min(frame.shape[:2]) // 40)
+        region_mask, (dx, dy) = None, (0, 0)
+        if roi is not None:
+            frame, region_mask, (dx, dy) = roi.crop(frame)
+        
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         height, width = frame.shape[:2]
         
+        if lamp_sizes is None:
+            size = base_size
+            lamp_sizes = []
+            while size * 3 <= height and size <= width:
+                lamp_sizes.append(size)
+                size = int(size * 1.5)
+        if not lamp_sizes:
+            return []
+        
+        # Zero padding lets the surround of border windows be read from the same integral
+        pad = max(lamp_sizes) // 2 + 1
+        thresholds = self.thresholds()
+        masks = [thresholds.mask(hsv, color) for color in LightThresholds.COLORS]
+        if region_mask is not None:
+            masks = [mask & region_mask for mask in masks]
+        integrals = [cv2.integral(cv2.copyMakeBorder(mask // 255, pad, pad, pad, pad,
+                                                     cv2.BORDER_CONSTANT, value=0))
+                     for mask in masks]
+        
+        def box_sums(integral, y0, x0, side, rows, cols, step):
+            # Strided views of the integral image: one O(1) box sum per grid position
+            y0, x0 = y0 + pad, x0 + pad
+            def corner(y, x):
+                return integral[y:y + rows * step:step, x:x + cols * step:step]
+            return (corner(y0 + side, x0 + side) - corner(y0, x0 + side) -
+                    corner(y0 + side, x0) + corner(y0, x0))
+        
+        boxes, housings, scores, lamps = [], [], [], []
+        for size in lamp_sizes:
+            step = max(2, size // 4)
+            size -= size % step  # Cells must sit on the window grid
+            shift = size // step
+            
+            # Box sums of every lamp-sized cell on the grid; cell k of a window is a row shift
+            grid_rows = (height - size) // step + 1
+            grid_cols = (width - size) // step + 1
+            rows = grid_rows - 2 * shift
+            if rows <= 0 or grid_cols <= 0:
+                continue
+            
+            area = float(size * size)
+            score = np.zeros((3, rows, grid_cols))
+            for color, integral in enumerate(integrals):
+                cells = box_sums(integral, 0, 0, size, grid_rows, grid_cols, step)
+                # Surround: 2x-size box centered on the cell, minus the cell itself
+                around = box_sums(integral, -(size // 2), -(size // 2), 2 * size,
+                                  grid_rows, grid_cols, step) - cells
+                
+                own = cells[color * shift:color * shift + rows] / area
+                ring = around[color * shift:color * shift + rows] / (3 * area)
+                spill = np.zeros_like(own)
+                for cell in range(3):
+                    if cell != color:
+                        spill = np.maximum(spill, cells[cell * shift:cell * shift + rows] / area)
+                
+                # A lit lamp fills its own cell and neither the other cells nor its surround
+                score[color] = own * (1.0 - np.maximum(spill, ring))
+            
+            best = score.max(axis=0)
+            iy, ix = np.nonzero(best >= min_confidence)
+            if iy.size == 0:
+                continue
+            lamp = score[:, iy, ix].argmax(axis=0)
+            for yi, xi, color in zip(iy.tolist(), ix.tolist(), lamp.tolist()):
+                x, y = xi * step, yi * step
+                # Suppression runs on the lit cell so partial windows around one lamp collapse
+                boxes.append([x, y + color * size, size, size])
+                housings.append((x, y, size, 3 * size))
+                scores.append(float(best[yi, xi]))
+                lamps.append(color)
+        
+        if not boxes:
+            return []
+        
+        lights = []
+        for idx in self._suppress_overlaps(np.array(boxes), np.array(scores), nms_threshold):
+            key = ('red', 'yellow', 'green')[lamps[idx]]
+            x, y, w, h = housings[idx]
+            lx, ly, lw, lh = boxes[idx]
+            lights.append({
+                'type': key,
+                'name': self.signal_names[key],
+                'box': (x + dx, y + dy, w, h),
+                'lamp_box': (lx + dx, ly + dy, lw, lh),
+                'color': self.signal_colors[key],
+                'confidence': scores[idx]
+            })
+        
+        return lights
+    
+    @staticmethod
+    def _suppress_overlaps(boxes, scores, threshold):
+        """
+        Greedy suppression using intersection over the smaller box, so a
+        partial window nested inside a stronger lamp is dropped even when
+        their IoU is low (different scales).
+        
+        Returns:
+            list: Indices of kept boxes, strongest first
+        """
+        x1, y1 = boxes[:, 0], boxes[:, 1]
+        x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+        areas = boxes[:, 2] * boxes[:, 3]
+        order = np.argsort(-scores)
+        keep = []
+        while order.size:
+            idx = order[0]
+            keep.append(int(idx))
+            rest = order[1:]
+            inter_w = np.clip(np.minimum(x2[idx], x2[rest]) - np.maximum(x1[idx], x1[rest]), 0, None)
+            inter_h = np.clip(np.minimum(y2[idx], y2[rest]) - np.maximum(y1[idx], y1[rest]), 0, None)
+            overlap = inter_w * inter_h / np.minimum(areas[idx], areas[rest])
+            order = rest[overlap <= threshold]
+        return keep
+    
+    def _shape_candidates(self, mask, width, height, min_area=500, min_side=20):
+        """
+        Batched shape features for the external contours of a binary mask.
+        Bounding box, area (shoelace) and perimeter of every contour are
+        computed in one vectorized NumPy pass over the concatenated contour
+        points and size-filtered with masks; polygon approximation only runs
+        on the survivors.
+        
+        Returns:
+            list: dicts with 'box', 'area', 'corners', 'circularity'
+        """
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return []
+        
+        lengths = np.fromiter((len(c) for c in contours), dtype=np.intp, count=len(contours))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        points = np.concatenate(contours).reshape(-1, 2).astype(np.int64)
+        px, py = points[:, 0], points[:, 1]
+        
+        # Index of the next point on each closed contour
+        following = np.arange(1, len(points) + 1)
+        following[starts + lengths - 1] = starts
+        
+        x = np.minimum.reduceat(px, starts)
+        y = np.minimum.reduceat(py, starts)
+        w = np.maximum.reduceat(px, starts) - x + 1
+        h = np.maximum.reduceat(py, starts) - y + 1
+        area = np.abs(np.add.reduceat(px * py[following] - px[following] * py, starts)) / 2.0
+        perimeter = np.add.reduceat(np.hypot(px[following] - px, py[following] - py), starts)
+        
+        keep = (area >= min_area) & \
+               (w >= min_side) & (h >= min_side) & \
+               (w <= width * 0.8) & (h <= height * 0.8)
+        
+        candidates = []
+        for idx in np.flatnonzero(keep):
+            corners = len(cv2.approxPolyDP(contours[idx], 0.02 * perimeter[idx], True))
+            circularity = 4 * np.pi * area[idx] / (perimeter[idx] ** 2) if perimeter[idx] else 0
+            candidates.append({
+                'box': (int(x[idx]), int(y[idx]), int(w[idx]), int(h[idx])),
+                'area': float(area[idx]),
+                'corners': corners,
+                'circularity': float(circularity)
+            })
+        
+        return candidates
+    
+    def detect_signs(self, frame, roi=None):
+        """
+        Detect traffic signs (Stop, Yield, Speed Limit).
+        
+        Args:
+            frame: Input image
+            roi: Optional CameraROI; only its crop is analyzed and sign pixels
+                 outside the polygons are ignored (boxes stay in frame coordinates)
+        """
+        full_frame = frame
+        height, width = frame.shape[:2]
+        region_mask, (dx, dy) = None, (0, 0)
+        if roi is not None:
+            frame, region_mask, (dx, dy) = roi.crop(frame)
+        crop_height, crop_width = frame.shape[:2]
+        
+        if self.pyramid_levels:
+            # Masks and morphology on the reduced frame, boxes mapped back to full resolution
+            scale = 2 ** self.pyramid_levels
+            small = self._pyramid_down(frame, self.pyramid_levels)
+            small_mask = roi.mask_for(region_mask, small.shape) if region_mask is not None else None
+            detections = self._detect_sign_shapes(small, (width, height), scale, small_mask)
+            for detection in detections:
+                detection['box'] = tuple(v * scale for v in detection['box'])
+            if self.refine:
+                detections = self._refine_signs(frame, detections, scale, (width, height), region_mask)
+        else:
+            detections = self._detect_sign_shapes(frame, (width, height), region_mask=region_mask)
+        
+        if roi is not None:
+            # Shapes cut by the ROI's edge (not the frame's) are truncated, not signs
+            region = (dx, dy, dx + crop_width, dy + crop_height)
+            tolerance = 2 ** self.pyramid_levels if self.pyramid_levels else 0
+            detections = [d for d in detections
+                          if not self._touches_cut(d['box'], region, (width, height), tolerance)]
+            for detection in detections:
+                x, y, w, h = detection['box']
+                detection['box'] = (x + dx, y + dy, w, h)
+        
+        classifier = self.sign_classifier()
+        if classifier is not None:
+            detections = self._classify_signs(full_frame, detections, classifier, roi)
+        
+        return detections if detections else [{'type': 'none', 'name': self.sign_names['none']}]
+    
+    def sign_classifier(self):
+        """Trained sign classifier in use (explicit or from config.ini), or None."""
+        if not self._classifier_pinned and self.config is not None:
+            path = self.config.current().signs.classifier_model
+            if path != self._classifier_path:
+                self._classifier_path = path
+                self._classifier = TrafficSignClassifier(path) if path else None
+        if self._classifier is not None and self._classifier.ready:
+            return self._classifier
+        return None
+    
+    def _classify_signs(self, frame, detections, classifier, roi=None):
+        """
+        Classification stage after the HSV proposals. Shape detections plus
+        red regions no shape matched are cropped and labelled in one
+        classify_batch() call. A confident label replaces the heuristic one
+        (or turns a red region into a detection); a confident 'background'
+        drops the candidate; otherwise shape detections keep their label.
+        """
+        height, width = frame.shape[:2]
+        boxes = [detection['box'] for detection in detections]
+        for x, y, w, h in self.propose_sign_regions(frame, roi=roi):
+            cx, cy = x + w // 2, y + h // 2
+            if not any(bx <= cx < bx + bw and by <= cy < by + bh for bx, by, bw, bh in boxes):
+                boxes.append((x, y, w, h))
+        if not boxes:
+            return detections
+        
+        crops = []
+        for x, y, w, h in boxes:
+            pad = max(w, h) // 10
+            crops.append(frame[max(0, y - pad):min(height, y + h + pad), max(0, x - pad):min(width, x + w + pad)])
+        
+        classified = []
+        for index, (box, (key, confidence)) in enumerate(zip(boxes, classifier.classify_batch(crops))):
+            if confidence >= classifier.min_confidence:
+                if key != BACKGROUND:
+                    classified.append({
+                        'type': key,
+                        'name': display_name(key),
+                        'box': box,
+                        'color': self._sign_color(key),
+                        'confidence': confidence
+                    })
+            elif index < len(detections):
+                classified.append(detections[index])
+        return classified
+    
+    def _sign_color(self, key):
+        if key in self.sign_colors:
+            return self.sign_colors[key]
+        if key.startswith('speed_limit'):
+            return self.sign_colors['speed_limit']
+        return (255, 128, 0)
+    
+    def _detect_sign_shapes(self, frame, frame_size, scale=1, region_mask=None):
+        """
+        HSV masks, morphology and shape classification for one image.
+        
+        Args:
+            frame: Image to analyze (full frame, reduced frame or crop)
+            frame_size: Full-resolution (width, height), used for the max-size filter
+            scale (int): Full-resolution pixels per pixel of `frame`; kernels and
+                         size thresholds shrink accordingly
+            region_mask: Optional ROI mask of `frame`'s size; pixels outside it are ignored
+        
+        Returns:
+            list: Detections with boxes in `frame` coordinates
+        """
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        width, height = frame_size[0] / scale, frame_size[1] / scale
+        min_area = 500 / (scale * scale)
+        min_side = 20 / scale
+        kernel = self.KERNEL_SIGN if scale == 1 else self._kernel(7, scale)
+        
         # Detect red masks for Stop and Yield
-        red_mask = cv2.inRange(hsv, self.SIGN_RED_LOWER1, self.SIGN_RED_UPPER1) + \
-                   cv2.inRange(hsv, self.SIGN_RED_LOWER2, self.SIGN_RED_UPPER2)
-        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, self.KERNEL_SIGN)
-        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, self.KERNEL_SIGN)
+        red_mask = self._sign_red_mask(hsv, kernel, region_mask)
         
         # Detect white mask for Speed Limit
         white_mask = cv2.inRange(hsv, self.SIGN_WHITE_LOWER, self.SIGN_WHITE_UPPER)
-        white_mask = cv2.morphologyEx(white_mask, cv2.MORPH_CLOSE, self.KERNEL_SIGN)
+        if region_mask is not None:
+            white_mask &= region_mask
+        white_mask = cv2.morphologyEx(white_mask, cv2.MORPH_CLOSE, kernel)
         
         detections = []
         
         # Process red signs (Stop and Yield)
-        contours_red, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for contour in contours_red:
-            area = cv2.contourArea(contour)
-            if area < 500:  # Minimum area
-                continue
-            
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Filter by size (signs should be reasonably large)
-            if w < 20 or h < 20 or w > width * 0.8 or h > height * 0.8:
-                continue
-            
-            corners = self._count_corners(contour)
-            circularity = self._circularity(contour)
+        for candidate in self._shape_candidates(red_mask, width, height, min_area, min_side):
+            corners = candidate['corners']
+            circularity = candidate['circularity']
             
             # Stop sign: 8 corners (octagon), high circularity
             if 7 <= corners <= 9 and circularity > 0.4:
                 detections.append({
                     'type': 'stop',
                     'name': self.sign_names['stop'],
-                    'box': (x, y, w, h),
+                    'box': candidate['box'],
                     'color': self.sign_colors['stop'],
                     'confidence': min(0.95, circularity)
                 })
@@ -162,45 +627,120 @@ class TrafficDetector:
                 detections.append({
                     'type': 'yield',
                     'name': self.sign_names['yield'],
-                    'box': (x, y, w, h),
+                    'box': candidate['box'],
                     'color': self.sign_colors['yield'],
                     'confidence': min(0.85, circularity + 0.2)
                 })
         
         # Process white signs (Speed Limit)
-        contours_white, _ = cv2.findContours(white_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for contour in contours_white:
-            area = cv2.contourArea(contour)
-            if area < 500:
-                continue
-            
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Speed limit: rectangular, white, roughly square
-            if w < 20 or h < 20 or w > width * 0.8 or h > height * 0.8:
-                continue
-            
-            ratio = self._shape_ratio(contour)
-            corners = self._count_corners(contour)
+        for candidate in self._shape_candidates(white_mask, width, height, min_area, min_side):
+            x, y, w, h = candidate['box']
+            ratio = w / h
             
             # Speed limit: 4 corners, roughly square (0.8-1.2 ratio)
-            if corners == 4 and 0.7 < ratio < 1.3:
+            if candidate['corners'] == 4 and 0.7 < ratio < 1.3:
                 detections.append({
                     'type': 'speed_limit',
                     'name': self.sign_names['speed_limit'],
-                    'box': (x, y, w, h),
+                    'box': candidate['box'],
                     'color': self.sign_colors['speed_limit'],
                     'confidence': 0.80
                 })
         
-        return detections if detections else [{'type': 'none', 'name': self.sign_names['none']}]
+        return detections
+    
+    def _sign_red_mask(self, hsv, kernel, region_mask=None):
+        """Cleaned red-sign mask (close then open) of an HSV image."""
+        red_mask = cv2.inRange(hsv, self.SIGN_RED_LOWER1, self.SIGN_RED_UPPER1) + \
+                   cv2.inRange(hsv, self.SIGN_RED_LOWER2, self.SIGN_RED_UPPER2)
+        if region_mask is not None:
+            red_mask &= region_mask
+        red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_CLOSE, kernel)
+        return cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, kernel)
     
-    def detect_all(self, frame):
-        """Detect both traffic lights and signs."""
-        light_signal, light_text, light_color = self.detect_light(frame)
-        signs = self.detect_signs(frame)
+    def propose_sign_regions(self, frame, min_area=150, max_proposals=8, roi=None):
+        """
+        Red regions that may hold a red sign (stage 1 of the sign cascade).
+        Uses the sign red mask and batched contour features without shape
+        classification, so partly occluded or distant signs still get a
+        proposal. Runs on the pyramid level when pyramid_levels is set.
         
-        return {
+        Args:
+            frame: Input image
+            min_area (int): Minimum blob area in full-resolution pixels
+            max_proposals (int): Largest blobs kept
+            roi: Optional CameraROI
+        
+        Returns:
+            list: (x, y, w, h) boxes in frame coordinates, largest first
+        """
+        height, width = frame.shape[:2]
+        region_mask, (dx, dy) = None, (0, 0)
+        if roi is not None:
+            frame, region_mask, (dx, dy) = roi.crop(frame)
+        
+        scale = 2 ** self.pyramid_levels if self.pyramid_levels else 1
+        if scale > 1:
+            frame = self._pyramid_down(frame, self.pyramid_levels)
+            if region_mask is not None:
+                region_mask = roi.mask_for(region_mask, frame.shape)
+        kernel = self.KERNEL_SIGN if scale == 1 else self._kernel(7, scale)
+        
+        red_mask = self._sign_red_mask(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV), kernel, region_mask)
+        candidates = self._shape_candidates(red_mask, width / scale, height / scale,
+                                            min_area / (scale * scale), 10 / scale)
+        candidates.sort(key=lambda c: -c['area'])
+        
+        proposals = []
+        for candidate in candidates[:max_proposals]:
+            x, y, w, h = (v * scale for v in candidate['box'])
+            proposals.append((x + dx, y + dy, w, h))
+        return proposals
+    
+    def _refine_signs(self, frame, detections, scale, frame_size=None, region_mask=None):
+        """Re-run full-resolution shape analysis on padded candidate regions only."""
+        height, width = frame.shape[:2]
+        frame_size = frame_size or (width, height)
+        refined = []
+        seen = set()
+        for detection in detections:
+            x, y, w, h = detection['box']
+            pad = 2 * scale + max(w, h) // 10
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(width, x + w + pad), min(height, y + h + pad)
+            
+            crop_mask = region_mask[y0:y1, x0:x1] if region_mask is not None else None
+            for found in self._detect_sign_shapes(frame[y0:y1, x0:x1], frame_size, region_mask=crop_mask):
+                fx, fy, fw, fh = found['box']
+                # Regions cut by the crop edge (not the frame edge) are truncated shapes
+                if found['type'] != detection['type'] or \
+                        self._touches_cut(found['box'], (x0, y0, x1, y1), (width, height)):
+                    continue
+                found['box'] = (fx + x0, fy + y0, fw, fh)
+                if (found['type'], found['box']) not in seen:
+                    seen.add((found['type'], found['box']))
+                    refined.append(found)
+        return refined
+    
+    @staticmethod
+    def _touches_cut(box, region, frame_size, tolerance=0):
+        """
+        True if a box (in the coordinates of `region`, an x0, y0, x1, y1 crop)
+        touches a crop edge that lies inside the frame.
+        """
+        fx, fy, fw, fh = box
+        x0, y0, x1, y1 = region
+        width, height = frame_size
+        return (fx <= tolerance and x0 > 0) or (fy <= tolerance and y0 > 0) or \
+               (fx + fw >= x1 - x0 - tolerance and x1 < width) or \
+               (fy + fh >= y1 - y0 - tolerance and y1 < height)
+    
+    def detect_all(self, frame, localize_lights=False, roi=None):
+        """Detect both traffic lights and signs (optionally inside a CameraROI)."""
+        light_signal, light_text, light_color = self.detect_light(frame, roi=roi)
+        signs = self.detect_signs(frame, roi=roi)
+        
+        results = {
             'light': {
                 'type': light_signal,
                 'text': light_text,
@@ -208,3 +748,8 @@ class TrafficDetector:
             },
             'signs': signs
         }
+        
+        if localize_lights:
+            results['lights'] = self.locate_lights(frame, roi=roi)
+        
+        return results
@@ -3,6 +3,7 @@ Unified Traffic Detection System
 Combines traffic light detection and traffic sign detection
 """
 
+import time
 import cv2
 import numpy as np
 from signal_detector import TrafficDetector
@@ -20,49 +21,129 @@ class UnifiedTrafficDetector:
     Provides a single interface for all traffic detection tasks.
     """
     
-    def __init__(self, enable_lights=True, enable_signs=True, sign_confidence=0.35):
+    def __init__(self, enable_lights=True, enable_signs=True, sign_confidence=None,
+                 localize_lights=False, config=None, cascade=False, full_frame_interval=30,
+                 crop_size=160):
         """
         Initialize unified detector.
         
         Args:
             enable_lights (bool): Enable traffic light detection
             enable_signs (bool): Enable traffic sign detection
-            sign_confidence (float): Confidence threshold for sign detection (higher = faster)
+            sign_confidence (float): Confidence threshold for sign detection (higher = faster);
+                                     default comes from config.ini, else 0.35
+            localize_lights (bool): Also locate each traffic light (3-lamp template search)
+            config: Optional ConfigManager shared by both detectors (hot-reloaded thresholds)
+            cascade (bool): Run the sign model only on crops around HSV red-region
+                            proposals instead of the full frame
+            full_frame_interval (int): In cascade mode, run a full-frame sign pass every
+                                       this many frames to catch signs HSV misses (0 = never)
+            crop_size (int): Model input size for cascade crops (multiple of 32)
         """
         self.light_detector = None
         self.sign_detector = None
         self.enable_lights = enable_lights
         self.enable_signs = enable_signs
+        self.localize_lights = localize_lights
+        self.cascade = cascade
+        self.full_frame_interval = full_frame_interval
+        self.crop_size = crop_size
+        self._since_full = full_frame_interval  # First frame gets a full pass
         
         if enable_lights:
-            self.light_detector = TrafficDetector()
+            self.light_detector = TrafficDetector(config=config)
             print("✅ Traffic Light Detector initialized")
         
         if enable_signs and SIGN_DETECTOR_AVAILABLE:
-            self.sign_detector = TrafficSignDetector(confidence=sign_confidence)
+            self.sign_detector = TrafficSignDetector(confidence=sign_confidence, config=config)
             print("✅ Traffic Sign Detector initialized")
+        
+        # Cascade proposals come from the HSV detector (created for them if lights are off)
+        self._proposer = self.light_detector
+        if cascade and self._proposer is None:
+            self._proposer = TrafficDetector(config=config)
     
-    def detect_all(self, frame):
+    def detect_all(self, frame, roi=None):
         """
         Detect both traffic lights and traffic signs in a frame.
         
         Args:
             frame: Input image (numpy array)
+            roi: Optional CameraROI restricting detection to a fixed camera's regions
         
         Returns:
             dict: Comprehensive detection results
         """
-        results = {
-            'lights': None,
-            'signs': None,
-            'annotated_frame': frame.copy(),
-            'summary': {}
-        }
+        return self.detect_batch([frame], rois=[roi])[0]
+    
+    def detect_batch(self, frames, rois=None):
+        """
+        Detect lights and signs in several frames (e.g. one per camera).
+        Light detection runs per frame; sign detection runs as one batched
+        model call, so N frames cost one inference instead of N.
         
-        # Detect traffic lights
+        Args:
+            frames: List of input images (sizes may differ)
+            rois: Optional list with a CameraROI (or None) per frame
+        
+        Returns:
+            list: One detect_all()-style result dict per frame; 'timings' holds
+                  per-stage milliseconds (the batched sign call is split evenly)
+        """
+        rois = rois or [None] * len(frames)
+        batch = []
+        for frame, roi in zip(frames, rois):
+            results = {
+                'lights': None,
+                'signs': None,
+                'annotated_frame': frame.copy(),
+                'summary': {},
+                'timings': {}
+            }
+            started = time.perf_counter()
+            self._add_lights(frame, results, roi)
+            results['timings']['lights'] = (time.perf_counter() - started) * 1000
+            batch.append(results)
+        
+        # Detect traffic signs (one batched call)
+        if self.enable_signs and self.sign_detector is not None and frames:
+            started = time.perf_counter()
+            sign_results = self._detect_signs_batch(frames, rois)
+            share = (time.perf_counter() - started) * 1000 / len(frames)
+            for sign_result, results in zip(sign_results, batch):
+                self._add_signs(sign_result, results)
+                results['timings']['signs'] = share
+        
+        for results in batch:
+            results['timings']['total'] = sum(results['timings'].values())
+        
+        return batch
+    
+    def _detect_signs_batch(self, frames, rois):
+        """Full-frame sign pass, or the HSV -> crop cascade when enabled (drawing is left to _add_signs)."""
+        if not self.cascade:
+            return self.sign_detector.detect_batch(frames, rois=rois, annotate=False)
+        
+        if self.full_frame_interval and self._since_full >= self.full_frame_interval:
+            self._since_full = 0
+            sign_results = self.sign_detector.detect_batch(frames, rois=rois, annotate=False)
+            mode = 'full'
+        else:
+            self._since_full += len(frames)
+            proposals = [self._proposer.propose_sign_regions(frame, roi=roi)
+                         for frame, roi in zip(frames, rois)]
+            sign_results = self.sign_detector.detect_regions(frames, proposals, imgsz=self.crop_size,
+                                                             rois=rois, annotate=False)
+            mode = 'cascade'
+        for sign_result in sign_results:
+            sign_result['mode'] = mode
+        return sign_results
+    
+    def _add_lights(self, frame, results, roi=None):
+        """Run light detection on one frame and add it to its results."""
         if self.enable_lights and self.light_detector is not None:
             try:
-                signal_key, signal_text, color = self.light_detector.detect_light(frame)
+                signal_key, signal_text, color = self.light_detector.detect_light(frame, roi=roi)
                 results['lights'] = {
                     'signal': signal_key,
                     'text': signal_text,
@@ -79,60 +160,68 @@ class UnifiedTrafficDetector:
                 cv2.rectangle(annotated, (10, 50), (200, 120), color, -1)
                 cv2.putText(annotated, signal_text, (30, 100),
                            cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+                
+                # Per-light boxes from the localized search
+                if self.localize_lights:
+                    instances = self.light_detector.locate_lights(frame, roi=roi)
+                    results['lights']['instances'] = instances
+                    for light in instances:
+                        x, y, w, h = light['box']
+                        cv2.rectangle(annotated, (x, y), (x + w, y + h), light['color'], 2)
+                        cv2.putText(annotated, f"{light['type'].upper()} ({light['confidence']:.0%})",
+                                   (x, y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, light['color'], 2)
+                
                 results['annotated_frame'] = annotated
             except Exception as e:
                 print(f"❌ Light detection error: {e}")
-        
-        # Detect traffic signs
-        if self.enable_signs and self.sign_detector is not None:
-            try:
-                sign_result = self.sign_detector.detect(frame)
-                results['signs'] = sign_result
+    
+    def _add_signs(self, sign_result, results):
+        """Add one frame's sign detections to its results and annotated frame."""
+        try:
+            results['signs'] = sign_result
+            
+            annotated = results['annotated_frame']  # Use annotated frame from lights
+            
+            # Add sign annotations on top of light annotations
+            for detection in sign_result.get('detections', []):
+                # Handle both 'bbox' (from YOLOv8) and 'box' (from HSV fallback) formats
+                if 'bbox' in detection:
+                    x1, y1, x2, y2 = detection['bbox']
+                    x, y, w, h = x1, y1, (x2 - x1), (y2 - y1)
+                elif 'box' in detection:
+                    x, y, w, h = detection['box']
+                    x1, y1, x2, y2 = x, y, x + w, y + h
+                else:
+                    continue
                 
-                annotated = results['annotated_frame']  # Use annotated frame from lights
+                name = detection.get('sign', detection.get('name', 'Unknown'))
+                color = detection.get('color', (0, 255, 0))
+                confidence = detection.get('confidence', 0)
                 
-                # Add sign annotations on top of light annotations
-                for detection in sign_result.get('detections', []):
-                    # Handle both 'bbox' (from YOLOv8) and 'box' (from HSV fallback) formats
-                    if 'bbox' in detection:
-                        x1, y1, x2, y2 = detection['bbox']
-                        x, y, w, h = x1, y1, (x2 - x1), (y2 - y1)
-                    elif 'box' in detection:
-                        x, y, w, h = detection['box']
-                        x1, y1, x2, y2 = x, y, x + w, y + h
-                    else:
-                        continue
-                    
-                    name = detection.get('sign', detection.get('name', 'Unknown'))
-                    color = detection.get('color', (0, 255, 0))
-                    confidence = detection.get('confidence', 0)
-                    
-                    # Draw bounding box
-                    cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
-                    
-                    # Draw label with confidence
-                    label = f"{name} ({confidence:.0%})" if 0 < confidence < 1 else name
-                    cv2.putText(annotated, label, (x1, y1 - 10),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                
-                results['annotated_frame'] = annotated
+                # Draw bounding box
+                cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
                 
+                # Draw label with confidence
+                label = f"{name} ({confidence:.0%})" if 0 < confidence < 1 else name
+                cv2.putText(annotated, label, (x1, y1 - 10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            
+            results['annotated_frame'] = annotated
+            
+            results['summary']['traffic_signs'] = {
+                'count': len(sign_result['signs']),
+                'signs': sign_result['signs'],
+                'status': sign_result['status']
+            }
+        except Exception as e:
+            print(f"❌ Sign detection error: {e}")
+            if 'traffic_light' not in results['summary']:
                 results['summary']['traffic_signs'] = {
-                    'count': len(sign_result['signs']),
-                    'signs': sign_result['signs'],
-                    'status': sign_result['status']
+                    'count': 0,
+                    'signs': [],
+                    'status': f"⚠️ Detection issue: {e}"
                 }
-            except Exception as e:
-                print(f"❌ Sign detection error: {e}")
-                if 'traffic_light' not in results['summary']:
-                    results['summary']['traffic_signs'] = {
-                        'count': 0,
-                        'signs': [],
-                        'status': f"⚠️ Detection issue: {e}"
-                    }
-        
-        return results
-    
+
     def detect_lights_only(self, frame):
         """
         Detect only traffic lights.
@@ -0,0 +1,363 @@
+"""
+Video Detection Jobs
+On-disk job store and background worker for detecting lights and signs
+in uploaded videos, with chunked uploads, progress and resumable results
+"""
+
+import contextlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+
+import cv2
+
+STATES = ('uploading', 'queued', 'processing', 'done', 'failed', 'cancelled')
+ACTIVE_STATES = ('uploading', 'queued', 'processing')
+RESULTS_FILE = 'results.jsonl'
+VIDEO_FILE = 'annotated.mp4'
+
+
+class VideoJobStore:
+    """
+    Jobs as directories under `root`: job.json (metadata, replaced
+    atomically on every update), upload.bin (the video, appended chunk by
+    chunk), results.jsonl and optionally annotated.mp4. Everything needed
+    to resume lives on disk, so a restarted process picks up where the
+    previous one stopped.
+    """
+
+    def __init__(self, root, max_upload_bytes=2 * 1024 ** 3):
+        """
+        Args:
+            root (str): Directory holding one sub-directory per job (created if missing)
+            max_upload_bytes (int): Largest accepted video
+        """
+        self.root = root
+        self.max_upload_bytes = max_upload_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, job_id, name='job.json'):
+        return os.path.join(self.root, job_id, name)
+
+    def create(self, filename='video.mp4', stride=5, annotate=False, batch_size=8):
+        """Register a new job waiting for its upload."""
+        if stride < 1 or batch_size < 1:
+            raise ValueError("stride and batch_size must be at least 1")
+        job = {
+            'id': uuid.uuid4().hex,
+            'filename': os.path.basename(filename),
+            'status': 'uploading',
+            'stride': int(stride),
+            'annotate': bool(annotate),
+            'batch_size': int(batch_size),
+            'received': 0,
+            'total_frames': None,
+            'fps': None,
+            'next_frame': 0,
+            'processed': 0,
+            'results_bytes': 0,
+            'progress': 0.0,
+            'error': None,
+            'created': time.time(),
+            'updated': time.time()
+        }
+        os.makedirs(os.path.join(self.root, job['id']))
+        self.save(job)
+        return job
+
+    def get(self, job_id):
+        """Job metadata, or None for unknown ids."""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self.path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, job):
+        job['updated'] = time.time()
+        directory = os.path.join(self.root, job['id'])
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, self.path(job['id']))
+
+    def update(self, job_id, only_from=None, **fields):
+        """
+        Read-modify-write of a job's metadata (returns the new metadata or None).
+
+        Raises:
+            ValueError: only_from is given and the job's status is not in it
+        """
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            if only_from is not None and job['status'] not in only_from:
+                raise ValueError(f"Job is {job['status']}")
+            job.update(fields)
+            self.save(job)
+            return job
+
+    def append_chunk(self, job_id, offset, data):
+        """
+        Append one upload chunk.
+
+        Args:
+            job_id (str): Job id
+            offset (int): Byte offset of the chunk; must equal the bytes received so far
+            data (bytes): Chunk payload
+
+        Returns:
+            dict: Updated job
+
+        Raises:
+            KeyError: Unknown job
+            ValueError: Job not uploading, wrong offset, or upload too large
+        """
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job['status'] != 'uploading':
+                raise ValueError(f"Job is {job['status']}, not uploading")
+            if offset != job['received']:
+                raise ValueError(f"Expected offset {job['received']}")
+            if job['received'] + len(data) > self.max_upload_bytes:
+                raise ValueError("Upload too large")
+            with open(self.path(job_id, 'upload.bin'), 'ab') as f:
+                f.truncate(job['received'])  # Drop bytes of a chunk that failed midway
+                f.write(data)
+            job['received'] += len(data)
+            self.save(job)
+            return job
+
+    def jobs(self, statuses=None):
+        """All jobs (optionally filtered by status), oldest first."""
+        found = []
+        for job_id in os.listdir(self.root):
+            job = self.get(job_id)
+            if job is not None and (statuses is None or job['status'] in statuses):
+                found.append(job)
+        return sorted(found, key=lambda job: job['created'])
+
+
+class VideoJobWorker:
+    """
+    Processes queued jobs one at a time on a background thread.
+
+    Every `stride`-th frame is collected into batches for
+    detector.detect_batch() (or detect_all() per frame for the HSV
+    TrafficDetector). After each batch the results file is flushed and
+    the job's checkpoint (next frame, results size) saved, so a job
+    interrupted by a restart resumes from its last batch. Jobs that write
+    an annotated video restart from the first frame instead, since a video
+    file cannot be appended to.
+    """
+
+    def __init__(self, store, detector, idle_timeout=1.0, scheduler=None):
+        """
+        Args:
+            store: VideoJobStore
+            detector: UnifiedTrafficDetector (batched), TrafficDetector, or a
+                      DetectorPool of either (one instance borrowed per batch)
+            idle_timeout (float): Seconds between checks of the stop flag when idle
+            scheduler: QoSScheduler; each batch then waits for a 'bulk' slot
+        """
+        self.store = store
+        self.detector = detector
+        self.scheduler = scheduler
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue()
+        self._cancelled = set()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Re-queue unfinished jobs from the store and start the worker thread."""
+        if self._thread is None:
+            for job in self.store.jobs(('queued', 'processing')):
+                self._queue.put(job['id'])
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def submit(self, job_id):
+        """Mark an uploaded job as queued."""
+        job = self.store.update(job_id, status='queued')
+        if job is not None:
+            self._queue.put(job_id)
+        return job
+
+    def cancel(self, job_id):
+        """
+        Stop a job (between batches if it is running).
+
+        Raises:
+            ValueError: Job already done, failed or cancelled
+        """
+        job = self.store.update(job_id, only_from=ACTIVE_STATES, status='cancelled')
+        self._cancelled.add(job_id)
+        return job
+
+    def _loop(self):
+        while self._running:
+            try:
+                job_id = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                continue
+            job = self.store.get(job_id)
+            if job is None or job['status'] not in ('queued', 'processing') or job_id in self._cancelled:
+                continue
+            try:
+                self.process(job)
+            except Exception as e:
+                self.store.update(job_id, status='failed', error=str(e))
+                print(f"❌ Video job {job_id} failed: {e}")
+
+    def process(self, job):
+        """Run detection over a job's video, resuming from its checkpoint."""
+        job_id = job['id']
+        capture = cv2.VideoCapture(self.store.path(job_id, 'upload.bin'))
+        if not capture.isOpened():
+            raise ValueError("Could not open the uploaded video")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+
+        if job['annotate'] and job['next_frame']:
+            job.update(next_frame=0, processed=0, results_bytes=0)
+        start = job['next_frame']
+        if start:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        job.update(status='processing', fps=fps, total_frames=total)
+        self.store.update(job_id, **{key: job[key] for key in ('status', 'fps', 'total_frames', 'next_frame',
+                                                              'processed', 'results_bytes')})
+
+        results = open(self.store.path(job_id, RESULTS_FILE), 'ab')
+        results.truncate(job['results_bytes'])  # Lines written after the last checkpoint
+        writer = None
+        index, batch, finished = start, [], False
+        try:
+            while self._running and job_id not in self._cancelled:
+                ok, frame = capture.read()
+                if ok and (index - start) % job['stride'] == 0:
+                    batch.append((index, frame))
+                if batch and (not ok or len(batch) >= job['batch_size']):
+                    writer = self._run_batch(job, batch, results, writer, fps)
+                    # Checkpoint: resume at the next sampled frame
+                    next_frame = batch[-1][0] + job['stride']
+                    job.update(next_frame=next_frame, processed=job['processed'] + len(batch),
+                               results_bytes=results.tell(),
+                               progress=round(min(1.0, next_frame / total), 4) if total else None)
+                    self.store.update(job_id, **{key: job[key] for key in ('next_frame', 'processed',
+                                                                          'results_bytes', 'progress')})
+                    batch = []
+                if not ok:
+                    finished = True
+                    break
+                index += 1
+        finally:
+            results.close()
+            capture.release()
+            if writer is not None:
+                writer.release()
+
+        if finished:
+            self.store.update(job_id, status='done', progress=1.0)
+            print(f"✅ Video job {job_id} done: {job['processed']} frames")
+
+    def _detect(self, frames):
+        if self.scheduler is None and not hasattr(self.detector, 'checkout'):
+            return self._detect_with(self.detector, frames)
+        # Wait out busy periods for a bulk slot and a pooled instance
+        while True:
+            try:
+                with self._slot():
+                    if not hasattr(self.detector, 'checkout'):
+                        return self._detect_with(self.detector, frames)
+                    with self.detector.checkout() as detector:
+                        return self._detect_with(detector, frames)
+            except TimeoutError:
+                if not self._running:
+                    raise
+
+    def _slot(self):
+        return self.scheduler.slot('bulk') if self.scheduler is not None else contextlib.nullcontext()
+
+    @staticmethod
+    def _detect_with(detector, frames):
+        if hasattr(detector, 'detect_batch'):
+            return detector.detect_batch(frames)
+        return [detector.detect_all(frame) for frame in frames]
+
+    def _run_batch(self, job, batch, results, writer, fps):
+        outputs = self._detect([frame for _, frame in batch])
+
+        for (index, frame), output in zip(batch, outputs):
+            record = frame_record(index, index / fps, output)
+            results.write((json.dumps(record) + '\n').encode('utf-8'))
+            if job['annotate']:
+                annotated = output.get('annotated_frame')
+                if annotated is None:
+                    annotated = draw_record(frame, record)
+                if writer is None:
+                    height, width = annotated.shape[:2]
+                    writer = cv2.VideoWriter(self.store.path(job['id'], VIDEO_FILE),
+                                             cv2.VideoWriter_fourcc(*'mp4v'),
+                                             max(1.0, fps / job['stride']), (width, height))
+                writer.write(annotated)
+        results.flush()
+        return writer
+
+
+def frame_record(index, timestamp, result):
+    """
+    JSON-ready record of one frame from a UnifiedTrafficDetector or
+    TrafficDetector.detect_all() result; boxes are (x, y, w, h).
+    """
+    if 'lights' in result or 'summary' in result:
+        light = (result.get('lights') or {}).get('signal', 'none')
+        signs = (result.get('signs') or {}).get('detections', [])
+    else:
+        light = result.get('light', {}).get('type', 'none')
+        signs = [sign for sign in result.get('signs', []) if sign.get('type') != 'none']
+
+    detections = []
+    for sign in signs:
+        if 'bbox' in sign:
+            x1, y1, x2, y2 = sign['bbox']
+            box = [int(x1), int(y1), int(x2 - x1), int(y2 - y1)]
+        else:
+            box = [int(v) for v in sign['box']]
+        detections.append({
+            'class': sign.get('sign', sign.get('type', 'unknown')),
+            'confidence': round(float(sign.get('confidence', 0.0)), 4),
+            'box': box
+        })
+    return {'frame': index, 'time': round(timestamp, 3), 'light': light, 'detections': detections}
+
+
+def draw_record(frame, record):
+    """Annotated copy of a frame from its record (for detectors without annotated output)."""
+    annotated = frame.copy()
+    cv2.putText(annotated, f"Light: {record['light'].upper()}", (20, 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    for detection in record['detections']:
+        x, y, w, h = detection['box']
+        cv2.rectangle(annotated, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(annotated, detection['class'], (x, y - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    return annotated
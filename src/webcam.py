@@ -1,10 +1,15 @@
 # Real-Time Traffic Signal Recognition using Webcam
 # OpenCV + HSV Color Detection
 
+import time
 import cv2
-from signal_detector import TrafficSignalDetector
+from signal_detector import TrafficDetector
+from adaptive_controller import AdaptiveResolutionController
+from capture import LatestFrameCapture
+from change_gate import SceneChangeGate
+from light_tracker import LightStateTracker
 
-def main(camera_id=0, display_fps=True, exit_key='q'):
+def main(camera_id=0, display_fps=True, exit_key='q', target_fps=30):
     """
     Real-time traffic signal detection from webcam.
     
@@ -12,19 +17,25 @@ def main(camera_id=0, display_fps=True, exit_key='q'):
         camera_id: Camera index (default 0 for primary camera)
         display_fps: Show FPS counter
         exit_key: Key to exit (default 'q')
+        target_fps: Frame rate the adaptive controller tunes for
     """
-    # Start webcam
-    cap = cv2.VideoCapture(camera_id)
+    # Start webcam (reader thread keeps only the newest frame)
+    cap = LatestFrameCapture(camera_id)
     
     if not cap.isOpened():
         print(f"Error: Camera {camera_id} not accessible")
         return False
+    cap.start()
     
     # Initialize detector
-    detector = TrafficSignalDetector()
+    detector = TrafficDetector()
+    controller = AdaptiveResolutionController(target_fps=target_fps)
+    gate = SceneChangeGate()
+    tracker = LightStateTracker()
     
     # FPS tracking
     frame_count = 0
+    signal_text, color = detector.signal_names['none'], detector.signal_colors['none']
     
     print(f"Press '{exit_key}' to exit")
     
@@ -36,11 +47,21 @@ def main(camera_id=0, display_fps=True, exit_key='q'):
         
         frame_count += 1
         
-        # Resize for consistent processing
-        frame = cv2.resize(frame, (640, 480))
+        # Resize to the controller's current processing resolution
+        frame = controller.prepare(frame)
         
-        # Detect traffic signal
-        signal_key, signal_text, color = detector.detect(frame)
+        # Detect traffic signal (every Nth frame under load)
+        if controller.should_detect():
+            started = time.perf_counter()
+            (signal_key, signal_text, color), reused = gate.run(frame, detector.detect_light)
+            if not reused:
+                controller.record((time.perf_counter() - started) * 1000)
+            
+            # Report debounced light changes only
+            event = tracker.update(signal_key)
+            if event:
+                print(f"🚦 {event['previous'].upper()} -> {event['state'].upper()} "
+                      f"after {event['dwell']:.1f}s{'' if event['plausible'] else ' (out of cycle)'}")
         
         # Display result
         cv2.putText(frame, signal_text, (20, 40),
@@ -48,13 +69,16 @@ def main(camera_id=0, display_fps=True, exit_key='q'):
         
         # Optional: Display FPS
         if display_fps and frame_count % 10 == 0:
-            print(f"Processed {frame_count} frames | Last signal: {signal_text}")
+            stats = controller.stats()
+            print(f"Processed {frame_count} frames | Last signal: {signal_text} | "
+                  f"{stats['resolution'][0]}x{stats['resolution'][1]}, stride {stats['stride']}")
         
         cv2.imshow("Real-Time Traffic Signal Recognition", frame)
         
         # Exit on key press
         if cv2.waitKey(1) & 0xFF == ord(exit_key):
-            print(f"Exiting... (processed {frame_count} frames)")
+            stats = cap.stats()
+            print(f"Exiting... (processed {frame_count} frames, dropped {stats['dropped']})")
             break
     
     # Cleanup
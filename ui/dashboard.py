@@ -9,7 +9,13 @@ import cv2
 import numpy as np
 from PIL import Image, ImageTk
 import threading
+import time
 from unified_detector import UnifiedTrafficDetector
+from detection_config import ConfigManager
+from adaptive_controller import AdaptiveResolutionController
+from capture import LatestFrameCapture
+from change_gate import SceneChangeGate
+from detection_log import writer_from_config
 
 class TrafficDashboard:
     def __init__(self, root):
@@ -29,12 +35,27 @@ class TrafficDashboard:
         
         self.root.configure(bg=self.bg_color)
         
+        # Thresholds from config.ini, picked up live when the file is edited
+        try:
+            config = ConfigManager()
+        except Exception as e:
+            print(f"⚠️ config.ini not loaded, using built-in thresholds: {e}")
+            config = None
+        
+        # Optional binary detection log ([LOGGING] DETECTION_LOG in config.ini)
+        try:
+            self.recorder = writer_from_config(config)
+        except Exception as e:
+            print(f"⚠️ Detection log disabled: {e}")
+            self.recorder = None
+        
         # Initialize unified detector - STOP SIGNS ONLY with HIGH accuracy
         try:
-            self.detector = UnifiedTrafficDetector(enable_lights=True, enable_signs=True, sign_confidence=0.55)
+            self.detector = UnifiedTrafficDetector(enable_lights=True, enable_signs=True, sign_confidence=0.55,
+                                                   config=config)
         except Exception as e:
             messagebox.showwarning("Warning", f"Could not initialize fully: {e}\nLights detection available")
-            self.detector = UnifiedTrafficDetector(enable_lights=True, enable_signs=False)
+            self.detector = UnifiedTrafficDetector(enable_lights=True, enable_signs=False, config=config)
         
         self.create_ui()
     
@@ -136,10 +157,19 @@ class TrafficDashboard:
             # Aggressive camera optimization
             cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Get fresh frames only
             cap.set(cv2.CAP_PROP_FPS, 60)  # 60 FPS for ultra-smooth video
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)  # Lower resolution at source
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)  # Largest processing resolution
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)  # Disable autofocus lag
             
+            # Self-tuning processing resolution and detection stride
+            controller = AdaptiveResolutionController(target_fps=60)
+            
+            # Capture on a background thread; detection always gets the newest frame
+            source = LatestFrameCapture(cap).start()
+            
+            # Reuse the last result while the scene is static
+            gate = SceneChangeGate()
+            
             self.update_status("📷 Webcam running @ 60 FPS... (Press 'q' to exit)")
             print("\n🚦 Traffic Detection - STOP SIGNS ONLY @ 60 FPS")
             print("Press 'q' to exit\n")
@@ -148,20 +178,25 @@ class TrafficDashboard:
             last_result = None
             
             while True:
-                ret, frame = cap.read()
+                ret, frame = source.read()
                 if not ret:
                     break
                 
                 frame_count += 1
                 
                 try:
-                    # Moderate resolution for good detection at 60 FPS
-                    proc_frame = cv2.resize(frame, (480, 360))
+                    # Resolution picked by the controller from measured latency
+                    proc_frame = controller.prepare(frame)
                     
-                    # Detect frequently for responsive detection
-                    if frame_count % 2 == 0:
+                    # Detect every Nth frame (stride adapts to load)
+                    if controller.should_detect():
                         try:
-                            result = self.detector.detect_all(proc_frame)
+                            started = time.perf_counter()
+                            result, reused = gate.run(proc_frame, self.detector.detect_all)
+                            if not reused:
+                                controller.record((time.perf_counter() - started) * 1000)
+                                if self.recorder is not None:
+                                    self.recorder.append_result('webcam', result)
                             last_result = result
                         except Exception as e:
                             result = last_result if last_result else {'annotated_frame': proc_frame}
@@ -175,7 +210,10 @@ class TrafficDashboard:
                     if frame_count % 120 == 0:
                         summary = result.get('summary', {})
                         light_info = summary.get('traffic_light', {})
-                        print(f"🚦 {light_info.get('detected', '?')} | FPS: {int(frame_count/max(1, frame_count//30))}")
+                        stats = controller.stats()
+                        print(f"🚦 {light_info.get('detected', '?')} | "
+                              f"{stats['resolution'][0]}x{stats['resolution'][1]} "
+                              f"every {stats['stride']} frame(s) | {stats['latency_ms']} ms")
                     
                     # Display
                     cv2.imshow("🚦 Traffic Detection (Press 'q' to exit)", annotated)
@@ -186,10 +224,15 @@ class TrafficDashboard:
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
             
-            cap.release()
+            source.release()
             cv2.destroyAllWindows()
+            if self.recorder is not None:
+                self.recorder.flush()
             self.update_status("Webcam closed")
-            print(f"✅ Processed {frame_count} frames")
+            stats = source.stats()
+            print(f"✅ Processed {frame_count} frames "
+                  f"(captured {stats['captured']}, dropped {stats['dropped']}, "
+                  f"static skips {gate.stats()['skipped']})")
         
         except Exception as e:
             messagebox.showerror("Error", f"Webcam error: {str(e)}")
@@ -225,6 +268,9 @@ class TrafficDashboard:
             
             # Detect BOTH lights AND signs together
             result = self.detector.detect_all(frame)
+            if self.recorder is not None:
+                self.recorder.append_result(os.path.basename(image_path), result)
+                self.recorder.flush()
             
             # Get detection results
             summary = result.get('summary', {})
@@ -0,0 +1,335 @@
+"""
+Evaluate detection accuracy and speed on a labeled image set
+
+Every image in the directory may have a JSON sidecar next to it
+(`photo.jpg` -> `photo.json`):
+
+    {
+        "light": "red",                                   # optional: red/yellow/green/none
+        "objects": [{"class": "stop", "box": [x, y, w, h]}]
+    }
+
+Images without a sidecar are skipped. Reports per-class precision,
+recall and AP at IoU 0.5, mAP, light-state accuracy, per-image latency
+and throughput, so a speed change can be judged against its accuracy cost.
+
+Usage:
+    python utils/evaluate.py data/ --detector hsv --pyramid 1 --json pyr1.json
+    python utils/evaluate.py data/ --detector hsv --baseline base.json
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import glob
+import json
+import time
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+IOU_THRESHOLD = 0.5
+
+# Detector output names -> annotation class names
+CLASS_ALIASES = {
+    'stop sign': 'stop',
+    'stop': 'stop',
+    'yield': 'yield',
+    'speed_limit': 'speed_limit',
+    'speed limit': 'speed_limit',
+}
+
+_detector = None
+_options = None
+
+
+def load_dataset(directory):
+    """List of (image_path, annotation) for every image with a JSON sidecar."""
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, '*'))):
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        sidecar = os.path.splitext(path)[0] + '.json'
+        if not os.path.exists(sidecar):
+            continue
+        with open(sidecar) as f:
+            annotation = json.load(f)
+        annotation.setdefault('objects', [])
+        samples.append((path, annotation))
+    return samples
+
+
+def _normalize(name):
+    name = str(name).lower().strip()
+    return CLASS_ALIASES.get(name, name)
+
+
+def _init_worker(options):
+    """Build one detector per process (models are not shared across processes)."""
+    global _detector, _options
+    _options = options
+    if options['workers'] > 1:
+        cv2.setNumThreads(1)  # Parallelism comes from processes; avoid oversubscription
+
+    kind = options['detector']
+    if kind == 'hsv':
+        from signal_detector import TrafficDetector
+        _detector = TrafficDetector(pyramid_levels=options['pyramid'], refine=options['refine'],
+                                    fused_counts=options['fused'], approximate=bool(options['approximate']),
+                                    sample_step=options['approximate'] or 4)
+    elif kind == 'yolo':
+        from sign_detector import TrafficSignDetector
+        _detector = TrafficSignDetector(confidence=options['sign_confidence'])
+    else:
+        from unified_detector import UnifiedTrafficDetector
+        _detector = UnifiedTrafficDetector(sign_confidence=options['sign_confidence'])
+
+
+def _predict(sample):
+    """Run the configured detector on one image; boxes are returned at original resolution."""
+    path, _ = sample
+    frame = cv2.imread(path)
+    if frame is None:
+        return path, None, [], 0.0
+
+    scale = 1.0
+    if _options['resize'] and frame.shape[1] > _options['resize']:
+        scale = frame.shape[1] / float(_options['resize'])
+        frame = cv2.resize(frame, (_options['resize'], int(round(frame.shape[0] / scale))),
+                           interpolation=cv2.INTER_AREA)
+
+    kind = _options['detector']
+    light, objects = None, []
+    started = time.perf_counter()
+    if kind == 'hsv':
+        light = _detector.detect_light(frame)[0]
+        for detection in _detector.detect_signs(frame):
+            if detection['type'] != 'none':
+                objects.append((detection['type'], detection['confidence'], detection['box']))
+    else:
+        result = _detector.detect(frame) if kind == 'yolo' else _detector.detect_all(frame)
+        if kind == 'unified':
+            light = (result['lights'] or {}).get('signal')
+            result = result['signs'] or {}
+        for detection in result.get('detections', []):
+            if 'bbox' in detection:
+                x1, y1, x2, y2 = detection['bbox']
+                box = (x1, y1, x2 - x1, y2 - y1)
+            else:
+                box = detection['box']
+            objects.append((detection.get('sign', detection.get('type')), detection['confidence'], box))
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    objects = [(_normalize(name), float(conf), tuple(v * scale for v in box)) for name, conf, box in objects]
+    return path, light, objects, latency_ms
+
+
+def iou(a, b):
+    """IoU of two (x, y, w, h) boxes."""
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = max(0.0, min(ax2, bx2) - max(a[0], b[0]))
+    inter_h = max(0.0, min(ay2, by2) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def average_precision(scores, matched, positives):
+    """All-point interpolated AP (VOC 2010+) from per-prediction scores and TP flags."""
+    if positives == 0:
+        return None
+    if not scores:
+        return 0.0
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    tp = np.asarray(matched, dtype=float)[order]
+    tp_cum = np.cumsum(tp)
+    fp_cum = np.cumsum(1.0 - tp)
+    recall = tp_cum / positives
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1e-9)
+
+    # Precision envelope, then area under the recall steps
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([0.0], precision, [0.0]))
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    steps = np.flatnonzero(recall[1:] != recall[:-1])
+    return float(np.sum((recall[steps + 1] - recall[steps]) * precision[steps + 1]))
+
+
+def score(samples, predictions):
+    """Accuracy metrics from annotations and (path -> (light, objects)) predictions."""
+    per_class = {}
+
+    def stats_for(name):
+        return per_class.setdefault(name, {'scores': [], 'matched': [], 'positives': 0})
+
+    light_total = light_correct = 0
+    confusion = {}
+    for path, annotation in samples:
+        light, objects = predictions[path]
+
+        if 'light' in annotation and light is not None:
+            light_total += 1
+            light_correct += int(light == annotation['light'])
+            key = f"{annotation['light']}->{light}"
+            confusion[key] = confusion.get(key, 0) + 1
+
+        truths = [(_normalize(o['class']), o['box']) for o in annotation['objects']]
+        for name, _ in truths:
+            stats_for(name)['positives'] += 1
+
+        # Greedy matching per class, most confident prediction first
+        used = set()
+        for name, conf, box in sorted(objects, key=lambda o: -o[1]):
+            best, best_iou = None, IOU_THRESHOLD
+            for index, (truth_name, truth_box) in enumerate(truths):
+                if truth_name != name or index in used:
+                    continue
+                overlap = iou(box, truth_box)
+                if overlap >= best_iou:
+                    best, best_iou = index, overlap
+            if best is not None:
+                used.add(best)
+            entry = stats_for(name)
+            entry['scores'].append(conf)
+            entry['matched'].append(best is not None)
+
+    classes = {}
+    for name, entry in sorted(per_class.items()):
+        tp = int(sum(entry['matched']))
+        predicted = len(entry['matched'])
+        classes[name] = {
+            'ground_truth': entry['positives'],
+            'predicted': predicted,
+            'precision': round(tp / predicted, 4) if predicted else None,
+            'recall': round(tp / entry['positives'], 4) if entry['positives'] else None,
+            'ap50': average_precision(entry['scores'], entry['matched'], entry['positives'])
+        }
+    aps = [c['ap50'] for c in classes.values() if c['ap50'] is not None]
+    return {
+        'classes': classes,
+        'map50': round(float(np.mean(aps)), 4) if aps else None,
+        'light_accuracy': round(light_correct / light_total, 4) if light_total else None,
+        'light_samples': light_total,
+        'light_confusion': confusion
+    }
+
+
+def evaluate(directory, detector='hsv', workers=1, pyramid=0, refine=False, fused=False,
+             resize=0, sign_confidence=None, approximate=0):
+    """
+    Run one detector configuration over a labeled directory.
+
+    Returns:
+        dict: Accuracy metrics (see score()) plus 'latency_ms' percentiles,
+              'throughput_fps' and the configuration used
+    """
+    samples = load_dataset(directory)
+    if not samples:
+        raise ValueError(f"No annotated images in {directory}")
+    options = {
+        'detector': detector, 'workers': workers, 'pyramid': pyramid, 'refine': refine,
+        'fused': fused, 'resize': resize, 'sign_confidence': sign_confidence,
+        'approximate': approximate
+    }
+
+    # Warm-up run outside the timed region (lazy imports, model load, JIT)
+    started = time.perf_counter()
+    if workers > 1:
+        with Pool(workers, initializer=_init_worker, initargs=(options,)) as pool:
+            pool.map(_predict, samples[:workers], chunksize=1)
+            started = time.perf_counter()
+            outputs = pool.map(_predict, samples, chunksize=max(1, len(samples) // (workers * 4)))
+    else:
+        _init_worker(options)
+        _predict(samples[0])
+        started = time.perf_counter()
+        outputs = [_predict(sample) for sample in samples]
+    elapsed = time.perf_counter() - started
+
+    predictions = {path: (light, objects) for path, light, objects, _ in outputs}
+    latencies = np.array([latency for _, _, _, latency in outputs])
+    report = score(samples, predictions)
+    report.update({
+        'config': options,
+        'images': len(samples),
+        'latency_ms': {
+            'mean': round(float(latencies.mean()), 2),
+            'p50': round(float(np.percentile(latencies, 50)), 2),
+            'p95': round(float(np.percentile(latencies, 95)), 2),
+            'max': round(float(latencies.max()), 2)
+        },
+        'throughput_fps': round(len(samples) / elapsed, 2) if elapsed > 0 else None
+    })
+    return report
+
+
+def print_report(report, baseline=None):
+    """Print a report, with deltas against a baseline report when given."""
+    def delta(key, value, fmt):
+        if baseline is None or value is None or baseline.get(key) is None:
+            return ''
+        return f"  ({value - baseline[key]:+{fmt}} vs baseline)"
+
+    config = report['config']
+    print(f"\n{'='*60}")
+    print(f"📊 EVALUATION: {config['detector']} on {report['images']} images")
+    print(f"   {', '.join(f'{k}={v}' for k, v in config.items() if k != 'detector')}")
+    print(f"{'='*60}")
+    print(f"{'Class':<16}{'GT':>5}{'Pred':>6}{'Prec':>8}{'Recall':>8}{'AP50':>8}")
+    for name, c in report['classes'].items():
+        fmt = lambda v: f"{v:.3f}" if v is not None else '-'
+        print(f"{name:<16}{c['ground_truth']:>5}{c['predicted']:>6}{fmt(c['precision']):>8}"
+              f"{fmt(c['recall']):>8}{fmt(c['ap50']):>8}")
+    if report['map50'] is not None:
+        print(f"\n🎯 mAP@0.5: {report['map50']:.3f}{delta('map50', report['map50'], '.3f')}")
+    if report['light_accuracy'] is not None:
+        print(f"🚦 Light accuracy: {report['light_accuracy']:.3f} on {report['light_samples']} images"
+              f"{delta('light_accuracy', report['light_accuracy'], '.3f')}")
+        errors = {k: v for k, v in report['light_confusion'].items() if k.split('->')[0] != k.split('->')[1]}
+        if errors:
+            print(f"   Confusions: {errors}")
+    latency = report['latency_ms']
+    print(f"⏱️  Latency: mean {latency['mean']} ms, p50 {latency['p50']} ms, p95 {latency['p95']} ms")
+    speedup = ''
+    if baseline and baseline.get('throughput_fps') and report['throughput_fps']:
+        speedup = f"  ({report['throughput_fps'] / baseline['throughput_fps']:.2f}x baseline)"
+    print(f"🚀 Throughput: {report['throughput_fps']} images/s{speedup}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate detection accuracy and speed on labeled images")
+    parser.add_argument('directory', help="Directory of images with JSON sidecar annotations")
+    parser.add_argument('--detector', choices=('hsv', 'yolo', 'unified'), default='hsv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--pyramid', type=int, default=0, help="TrafficDetector pyramid_levels")
+    parser.add_argument('--refine', action='store_true', help="TrafficDetector refine (with --pyramid)")
+    parser.add_argument('--fused', action='store_true', help="TrafficDetector fused_counts")
+    parser.add_argument('--resize', type=int, default=0, help="Downscale images to this width first")
+    parser.add_argument('--approximate', type=int, default=0, metavar='STEP',
+                        help="Light verdict from every STEP-th pixel (TrafficDetector approximate mode)")
+    parser.add_argument('--sign-confidence', type=float, default=None, help="YOLO confidence threshold")
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--baseline', help="Earlier --json report to compare against")
+    args = parser.parse_args()
+
+    report = evaluate(args.directory, args.detector, args.workers, args.pyramid, args.refine,
+                      args.fused, args.resize, args.sign_confidence, args.approximate)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
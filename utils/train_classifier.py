@@ -0,0 +1,99 @@
+"""
+Train the traffic sign crop classifier from local images
+
+Expects one folder per class:
+
+    data/signs/
+        00000/ ... 00042/     # GTSRB class ids (mapped to sign types)
+        stop/  no_entry/      # or sign type names
+        background/           # optional: non-sign crops, rejected at inference
+
+Features (HOG + color) are extracted once, a softmax model is fitted with
+NumPy, and the .npz written to --output can be set as CLASSIFIER_MODEL in
+config.ini or passed to TrafficDetector(classifier=...).
+
+Usage:
+    python utils/train_classifier.py data/signs --output models/sign_classifier.npz
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from sign_classifier import TrafficSignClassifier, class_key, extract_features, train_softmax
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.ppm')
+
+
+def load_images(directory, max_per_class=0):
+    """(crops, labels, class keys) from one sub-folder per class."""
+    crops, labels, classes = [], [], []
+    for folder in sorted(os.listdir(directory)):
+        paths = [path for path in sorted(glob.glob(os.path.join(directory, folder, '*')))
+                 if path.lower().endswith(IMAGE_EXTENSIONS)]
+        if max_per_class:
+            paths = paths[:max_per_class]
+        images = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+        if not images:
+            continue
+        key = class_key(folder)
+        if key not in classes:
+            classes.append(key)
+        crops.extend(images)
+        labels.extend([classes.index(key)] * len(images))
+    return crops, np.array(labels, dtype=np.int64), classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the HOG + softmax traffic sign classifier")
+    parser.add_argument('directory', help="Directory with one sub-folder of crops per class")
+    parser.add_argument('--output', default='models/sign_classifier.npz', help="Model file to write")
+    parser.add_argument('--validation', type=float, default=0.1, help="Fraction held out for accuracy")
+    parser.add_argument('--epochs', type=int, default=60)
+    parser.add_argument('--learning-rate', type=float, default=0.1)
+    parser.add_argument('--l2', type=float, default=1e-4, help="Weight decay")
+    parser.add_argument('--max-per-class', type=int, default=0, help="Cap images per class (0 = all)")
+    args = parser.parse_args()
+
+    crops, labels, classes = load_images(args.directory, args.max_per_class)
+    if len(classes) < 2:
+        print("❌ Need at least two class folders with images")
+        sys.exit(1)
+    print(f"📂 {len(crops)} crops in {len(classes)} classes")
+
+    started = time.perf_counter()
+    features = extract_features(crops)
+    print(f"🔄 Features: {features.shape[1]} per crop ({time.perf_counter() - started:.1f}s)")
+
+    order = np.random.default_rng(0).permutation(len(labels))
+    held_out = int(len(order) * args.validation)
+    validation, train = order[:held_out], order[held_out:]
+
+    started = time.perf_counter()
+    model = train_softmax(features[train], labels[train], len(classes), epochs=args.epochs,
+                          learning_rate=args.learning_rate, l2=args.l2)
+    print(f"🔄 Trained in {time.perf_counter() - started:.1f}s")
+
+    classifier = TrafficSignClassifier()
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    classifier.save(args.output, model, classes)
+
+    def accuracy(indices):
+        x = (features[indices] - model['mean']) / model['scale']
+        predicted = (x @ model['weights'] + model['bias']).argmax(axis=1)
+        return float(np.mean(predicted == labels[indices]))
+
+    print(f"   Train accuracy: {accuracy(train):.1%}")
+    if held_out:
+        print(f"   Validation accuracy: {accuracy(validation):.1%}")
+    print(f"✅ Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()